@@ -4,8 +4,21 @@
 import streamlit as st
 import pandas as pd
 import os
-import altair as alt
-import re 
+import time
+
+from almacen import cargar_dataset
+from features import VENTANA_PARTIDOS, VENTANA_DIAS
+from filtros import OPCIONES_RACHA, ROLES
+from metricas import BREAK_EVEN, APUESTA
+from motor import Motor, COLUMNAS_MOTOR, metricas, metricas_conteos
+from particiones import MotorDisco, COLUMNAS_BACKTEST, huella_version, limpiar_versiones
+from escaner import ARCHIVO_ESCANER, DIMENSIONES, COLUMNAS_METRICAS, COLUMNA_ROL, rankear
+from estadistica import ALFA, COLUMNAS_ESTADISTICA, intervalos, bootstrap_roi, significativo
+from graficos import ORDEN_REST, ORDEN_TRAVEL, resumen_ats, resumenes, chart_ats, chart_ou, chart_ats_por, chart_curva
+import backtest
+from tabla import TAMANOS_PAGINA, num_paginas, pagina, estilo_pagina, exportar_csv, exportar_parquet
+from instrumentacion import Instrumentacion
+from recarga import Recargador
 
 # ==============================================================================
 # 2. CONFIGURACIÓN E INTERFAZ
@@ -31,212 +44,75 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Instrumentación opcional: NBA_INSTRUMENTAR=1 o ?instrumentar=1 en la URL.
+# Tiempos / memoria / filas por etapa en el sidebar y en .cache_v14/instrumentacion.jsonl
+INSTRUMENTAR = os.environ.get('NBA_INSTRUMENTAR') == '1' or st.query_params.get('instrumentar') == '1'
+inst = Instrumentacion(INSTRUMENTAR)
+
 # ==============================================================================
 # 3. PROCESAMIENTO DE DATOS
 # ==============================================================================
-ARCHIVO = 'datos.xlsx'
-
-def parse_teams(row):
-    try:
-        p = str(row['Partido (Local vs Visitante)']).strip()
-        parts = p.split(' vs ')
-        if len(parts) != 2: return None, None
-        h_match = re.match(r'^([A-Z]+)', parts[0].strip())
-        a_match = re.match(r'^([A-Z]+)', parts[1].strip())
-        if h_match and a_match:
-            return h_match.group(1), a_match.group(1)
-        return None, None
-    except:
-        return None, None
-
-def invertir_clasificacion(texto):
-    """
-    Invierte la clasificación del Excel para el equipo contrario.
-    Ej: "Favorito Pesado" -> "Underdog Pesado"
-    """
-    if pd.isna(texto): return "N/A"
-    texto = str(texto)
-    
-    if "Favorito" in texto:
-        return texto.replace("Favorito", "Underdog")
-    elif "Underdog" in texto:
-        return texto.replace("Underdog", "Favorito")
-    # Si dice Pick'em o algo neutro, se queda igual (o ajusta según tu excel)
-    return texto
+ARCHIVO = 'datos.xlsx'  # También una carpeta ('datos/') o un glob ('datos/*.xlsx')
+MODO_INCREMENTAL = True  # Reanuda desde el estado por equipo guardado en .cache_v14/
+# Backend fuera de memoria opcional: NBA_PARTICIONES=<carpeta> consulta el
+# Parquet particionado por temporada en vez de tener el df completo en cada
+# proceso. Lo exporta `python particiones.py`; la app solo abre la versión
+# vigente y se cambia a la siguiente cuando el CLI la exporta
+PARTICIONES = os.environ.get('NBA_PARTICIONES')
 
-@st.cache_data
 def cargar_datos_v14():
-    if not os.path.exists(ARCHIVO): return None
-    try:
-        try: df = pd.read_excel(ARCHIVO)
-        except: df = pd.read_csv(ARCHIVO)
-        df.columns = df.columns.str.strip()
-        
-        if 'Fecha' in df.columns: df['Fecha'] = pd.to_datetime(df['Fecha'])
-        df = df.sort_values('Fecha').reset_index(drop=True)
-        if 'HomeTeam' not in df.columns:
-            df[['HomeTeam', 'AwayTeam']] = df.apply(parse_teams, axis=1, result_type='expand')
-
-        team_history = {} 
-        team_streaks = {} 
-        
-        new_cols = {
-            # Rachas
-            'Calc_Home_Streak': [], 'Calc_Away_Streak': [],
-            # Rest y Viaje
-            'Calc_Home_Rest': [], 'Calc_Away_Rest': [],
-            'Calc_Home_Travel': [], 'Calc_Away_Travel': [],
-            'Calc_Pick_Travel': [], 'Calc_Opp_Travel': [],
-            # Previos Generales
-            'Calc_Home_Prev_ATS': [], 'Calc_Away_Prev_ATS': [],
-            'Calc_Home_Prev_ML': [], 'Calc_Away_Prev_ML': [], 
-            'Calc_Home_Prev_OU': [], 'Calc_Away_Prev_OU': [],
-            # Previos Relativos al Pick
-            'Calc_Pick_Prev_ATS': [], 'Calc_Opp_Prev_ATS': [],
-            'Calc_Pick_Prev_ML': [], 'Calc_Opp_Prev_ML': [],
-            'Calc_Pick_Prev_OU': [], 'Calc_Opp_Prev_OU': [],
-            # CLASIFICACIÓN REAL (NUEVO)
-            'Real_Home_Class': [], 'Real_Away_Class': [],
-            # Flags
-            'Real_Home_Covered': [], 'Real_Away_Covered': [],
-            'Real_Home_Won': [], 'Real_Away_Won': []
-        }
-
-        for idx, row in df.iterrows():
-            home, away = row['HomeTeam'], row['AwayTeam']
-            pick = row['Selección Modelo']
-            game_date = row['Fecha']
-            
-            # --- LÓGICA DE CLASIFICACIÓN (ESPEJO) ---
-            # Obtenemos la clasificación del Pick desde el Excel
-            class_pick = row.get('Tipo de Momio', 'N/A')
-            class_opp = invertir_clasificacion(class_pick)
-            
-            if pick == home:
-                new_cols['Real_Home_Class'].append(class_pick)
-                new_cols['Real_Away_Class'].append(class_opp)
-            else: # Pick is Away
-                new_cols['Real_Away_Class'].append(class_pick)
-                new_cols['Real_Home_Class'].append(class_opp)
-
-            # --- RACHAS & HISTORIA (Standard) ---
-            h_streak = team_streaks.get(home, 0)
-            a_streak = team_streaks.get(away, 0)
-            new_cols['Calc_Home_Streak'].append(h_streak)
-            new_cols['Calc_Away_Streak'].append(a_streak)
-
-            h_last = team_history.get(home)
-            a_last = team_history.get(away)
-            
-            def get_rest(last):
-                if not last: return "N/A"
-                delta = (game_date - last['date']).days - 1
-                return "0" if delta < 0 else "3+" if delta >= 3 else str(delta)
-            
-            def get_travel(last, is_home_now):
-                if not last: return "N/A"
-                if last['was_home']: return "L-L (Homestand)" if is_home_now else "L-V (Sale)"
-                else: return "V-L (Regresa)" if is_home_now else "V-V (Gira)"
-            
-            def get_prev_ats(last): return "SI" if last and last['covered'] else ("NO" if last else "N/A")
-            def get_prev_ml(last): return "SI" if last and last['won'] else ("NO" if last else "N/A")
-            def get_prev_ou(last): return last['ou'] if last else "N/A"
-
-            # Generales
-            h_trav = get_travel(h_last, True)
-            a_trav = get_travel(a_last, False)
-            new_cols['Calc_Home_Travel'].append(h_trav)
-            new_cols['Calc_Away_Travel'].append(a_trav)
-            new_cols['Calc_Home_Rest'].append(get_rest(h_last))
-            new_cols['Calc_Away_Rest'].append(get_rest(a_last))
-            
-            new_cols['Calc_Home_Prev_ATS'].append(get_prev_ats(h_last))
-            new_cols['Calc_Away_Prev_ATS'].append(get_prev_ats(a_last))
-            new_cols['Calc_Home_Prev_ML'].append(get_prev_ml(h_last))
-            new_cols['Calc_Away_Prev_ML'].append(get_prev_ml(a_last))
-            new_cols['Calc_Home_Prev_OU'].append(get_prev_ou(h_last))
-            new_cols['Calc_Away_Prev_OU'].append(get_prev_ou(a_last))
-
-            # Relativos al Pick
-            if pick == home:
-                pick_last, opp_last = h_last, a_last
-                pick_trav, opp_trav = h_trav, a_trav
-            else:
-                pick_last, opp_last = a_last, h_last
-                pick_trav, opp_trav = a_trav, h_trav
-            
-            new_cols['Calc_Pick_Travel'].append(pick_trav)
-            new_cols['Calc_Opp_Travel'].append(opp_trav)
-            new_cols['Calc_Pick_Prev_ATS'].append(get_prev_ats(pick_last))
-            new_cols['Calc_Opp_Prev_ATS'].append(get_prev_ats(opp_last))
-            new_cols['Calc_Pick_Prev_ML'].append(get_prev_ml(pick_last))
-            new_cols['Calc_Opp_Prev_ML'].append(get_prev_ml(opp_last))
-            new_cols['Calc_Pick_Prev_OU'].append(get_prev_ou(pick_last))
-            new_cols['Calc_Opp_Prev_OU'].append(get_prev_ou(opp_last))
-
-            # RESULTADOS
-            is_pick_home = (pick == home)
-            ats_hit = (row['Resultado ATS'] == 'SI')
-            ml_hit = (row['Resultado ML'] == 'SI')
-            
-            if is_pick_home:
-                home_covered = ats_hit
-                away_covered = not ats_hit
-            else:
-                away_covered = ats_hit
-                home_covered = not ats_hit
-            
-            if ml_hit: winner_team = pick
-            else: winner_team = away if is_pick_home else home
-                
-            home_won = (winner_team == home)
-            away_won = (winner_team == away)
-            
-            new_cols['Real_Home_Covered'].append(home_covered)
-            new_cols['Real_Away_Covered'].append(away_covered)
-            new_cols['Real_Home_Won'].append(home_won)
-            new_cols['Real_Away_Won'].append(away_won)
-            
-            if home_won:
-                team_streaks[home] = h_streak + 1 if h_streak > 0 else 1
-                team_streaks[away] = a_streak - 1 if a_streak < 0 else -1
-            else:
-                team_streaks[away] = a_streak + 1 if a_streak > 0 else 1
-                team_streaks[home] = h_streak - 1 if h_streak < 0 else -1
-
-            team_history[home] = {'date': game_date, 'covered': home_covered, 'won': home_won, 'ou': row['Resultado O/U'], 'was_home': True}
-            team_history[away] = {'date': game_date, 'covered': away_covered, 'won': away_won, 'ou': row['Resultado O/U'], 'was_home': False}
-
-        for k, v in new_cols.items(): df[k] = v
-        df['Fecha_Str'] = df['Fecha'].dt.strftime('%Y-%m-%d')
-        return df 
-    except Exception as e:
-        st.error(f"Error V14: {e}")
-        return None
-
-df = cargar_datos_v14()
-
-if df is None:
-    st.error(f"❌ Error crítico. Verifica '{ARCHIVO}'")
+    # df compacto + índice de filtros y tabla equipo-partido (motor.py), o el
+    # backend de particiones; nadie los modifica, los filtros seleccionan
+    # filas con arrays de posiciones
+    if PARTICIONES: return MotorDisco(PARTICIONES)
+    return Motor(cargar_dataset(ARCHIVO, incremental=MODO_INCREMENTAL))
+
+def liberar_particiones(nuevo, anterior):
+    # Tras el cambio: la versión anterior se conserva para las corridas que la
+    # tomaron antes del cambio; las más viejas ya no las lee nadie
+    limpiar_versiones(PARTICIONES, [m.carpeta for m in (nuevo, anterior) if m is not None])
+
+# cache_resource: un solo cargador por servidor, compartido por todas las
+# sesiones. Construye en segundo plano, vigila ARCHIVO (o el puntero de las
+# particiones) y cambia de versión de una sola asignación; si una recarga
+# falla se sigue con la versión anterior. Si el recurso se descarta
+# (st.cache_resource.clear) su hilo se detiene
+@st.cache_resource(on_release=Recargador.detener)
+def recargador_v14():
+    if PARTICIONES: return Recargador(PARTICIONES, cargar_datos_v14, al_cambiar=liberar_particiones, huella=huella_version).iniciar()
+    return Recargador(ARCHIVO, cargar_datos_v14).iniciar()
+
+with inst.etapa('cargar_datos_v14') as e:
+    recargador = recargador_v14()
+    motor = recargador.obtener()  # Solo espera en el arranque en frío
+    e['filas'] = None if motor is None else (motor.meta['filas'] if PARTICIONES else len(motor.df))
+
+if motor is None:
+    st.error(f"❌ Error crítico. Verifica '{recargador.ruta}'" + (f" ({recargador.error})" if recargador.error else ""))
     st.stop()
+if recargador.error: st.sidebar.warning(f"⚠️ Falló la recarga de '{recargador.ruta}' ({recargador.error}); se muestran los datos cargados a las {time.strftime('%H:%M:%S', time.localtime(recargador.cargado_en))}.")
+indice = motor.indice
+
+@st.cache_data
+def cargar_escaner(ruta, mtime):
+    # Resultados de `python escaner.py`; mtime invalida el cache al re-escanear.
+    # Se re-rankea por si el archivo viene de una versión anterior del escáner
+    return rankear(pd.read_parquet(ruta))
 
 # ==============================================================================
 # 4. INTERFAZ Y FILTROS
 # ==============================================================================
 st.sidebar.markdown("### 🎛️ MODO DE ANÁLISIS")
 modo_analisis = st.sidebar.radio("Enfoque:", ["🤖 Rendimiento del Modelo", "🌍 Tendencias de Equipo (Mercado)"], index=1)
+inst.contexto['modo'] = modo_analisis
 st.sidebar.markdown("---")
 
 def crear_filtro(etiqueta, columna, key_id):
-    if columna not in df.columns: return 'Todos'
-    valores = df[columna].fillna("N/A").astype(str).unique()
-    valores = [v for v in valores if v != "" and v != "nan"]
-    return st.sidebar.selectbox(etiqueta, ['Todos'] + sorted(valores), key=key_id)
+    if not indice.tiene(columna): return 'Todos'
+    return st.sidebar.selectbox(etiqueta, ['Todos'] + indice.valores(columna), key=key_id)
 
 def crear_filtro_racha_rango(etiqueta, key_id):
-    opciones = ["Todos", "3+ Victorias (🔥)", "4+ Victorias (🔥🔥)", "5+ Victorias (🔥🔥🔥)", "6+ Victorias (🚀)",
-                "3+ Derrotas (❄️)", "4+ Derrotas (❄️❄️)", "5+ Derrotas (🧊)", "6+ Derrotas (💀)"]
-    return st.sidebar.selectbox(etiqueta, opciones, key=key_id)
+    return st.sidebar.selectbox(etiqueta, OPCIONES_RACHA, key=key_id)
 
 # Variables globales filtro
 f_equipo, f_condicion, f_confianza, f_h2h = 'Todos', 'Todos', 'Todos', 'Todos'
@@ -276,13 +152,13 @@ if modo_analisis == "🤖 Rendimiento del Modelo":
 
 elif modo_analisis == "🌍 Tendencias de Equipo (Mercado)":
     with st.sidebar.expander("🌍 Filtros de Equipo", expanded=True):
-        all_teams = sorted(list(set(df['HomeTeam'].unique()) | set(df['AwayTeam'].unique())))
+        all_teams = sorted(set(indice.valores('HomeTeam')) | set(indice.valores('AwayTeam')))
         f_target_team = st.sidebar.selectbox("Equipo Objetivo", ['Todos'] + all_teams, key="t_team")
-        f_role = st.sidebar.selectbox("Rol", ["Todos", "Local (Home)", "Visita (Away)"], key="t_role")
+        f_role = st.sidebar.selectbox("Rol", ROLES, key="t_role")
         
         # FILTRO MEJORADO: Clasificación Específica (Pesado, Moderado, etc.)
         # Unificamos todas las clases posibles (Home y Away) para llenar el combo
-        all_classes = sorted(list(set(df['Real_Home_Class'].unique()) | set(df['Real_Away_Class'].unique())))
+        all_classes = sorted(set(indice.valores('Real_Home_Class')) | set(indice.valores('Real_Away_Class')))
         all_classes = [c for c in all_classes if c != "N/A"]
         f_status_team_class = st.sidebar.selectbox("Clasificación Mercado (Odds Type)", ['Todos'] + all_classes, key="t_stat_class")
         
@@ -319,140 +195,184 @@ with st.sidebar.expander("📊 Mercado"):
     else:
         f_ml = 'Todos' 
 
+with st.sidebar.expander(f"📈 Ventanas (últimos {VENTANA_PARTIDOS} / {VENTANA_DIAS} días)"):
+    # Récords G-P sobre los últimos N partidos ("N/A" si aún no jugó N)
+    c1, c2 = st.columns(2)
+    with c1: f_ats_ult_h = crear_filtro("ATS Local", "Calc_Home_ATS_Ult", "v_ats_h")
+    with c2: f_ats_ult_a = crear_filtro("ATS Visita", "Calc_Away_ATS_Ult", "v_ats_a")
+    c3, c4 = st.columns(2)
+    with c3: f_ml_ult_h = crear_filtro("ML Local", "Calc_Home_ML_Ult", "v_ml_h")
+    with c4: f_ml_ult_a = crear_filtro("ML Visita", "Calc_Away_ML_Ult", "v_ml_a")
+    c5, c6 = st.columns(2)
+    with c5: f_ats_rol_h = crear_filtro("ATS Local (en casa)", "Calc_Home_ATS_Rol", "v_rol_h")
+    with c6: f_ats_rol_a = crear_filtro("ATS Visita (de visita)", "Calc_Away_ATS_Rol", "v_rol_a")
+    st.markdown("---")
+    c7, c8 = st.columns(2)
+    with c7: f_juegos_dias_h = crear_filtro(f"Juegos {VENTANA_DIAS}d Local", "Calc_Home_Juegos_Dias", "v_jd_h")
+    with c8: f_juegos_dias_a = crear_filtro(f"Juegos {VENTANA_DIAS}d Visita", "Calc_Away_Juegos_Dias", "v_jd_a")
+    c9, c10 = st.columns(2)
+    with c9: f_b2b_dias_h = crear_filtro(f"B2B {VENTANA_DIAS}d Local", "Calc_Home_B2B_Dias", "v_b2b_h")
+    with c10: f_b2b_dias_a = crear_filtro(f"B2B {VENTANA_DIAS}d Visita", "Calc_Away_B2B_Dias", "v_b2b_a")
+
 # ==============================================================================
 # 5. FILTRADO
 # ==============================================================================
-df_f = df.copy()
-
-if f_h2h != 'Todos': df_f = df_f[df_f['H2H_Season'].fillna("").astype(str) == f_h2h]
-
-if modo_analisis == "🤖 Rendimiento del Modelo":
-    if f_equipo != 'Todos': df_f = df_f[df_f['Selección Modelo'] == f_equipo]
-    if f_condicion != 'Todos': df_f = df_f[df_f['EsLocal'] == f_condicion]
-    if f_confianza != 'Todos': df_f = df_f[df_f['Confianza'] == f_confianza]
-    if f_ml != 'Todos': df_f = df_f[df_f['Tipo de Momio'] == f_ml]
-
-    # Situacional (Pick/Opp)
-    if f_travel_pick != 'Todos': df_f = df_f[df_f['Calc_Pick_Travel'] == f_travel_pick]
-    if f_travel_opp != 'Todos': df_f = df_f[df_f['Calc_Opp_Travel'] == f_travel_opp]
-    if f_prev_pick_ats != 'Todos': df_f = df_f[df_f['Calc_Pick_Prev_ATS'] == f_prev_pick_ats]
-    if f_prev_opp_ats != 'Todos': df_f = df_f[df_f['Calc_Opp_Prev_ATS'] == f_prev_opp_ats]
-    if f_prev_pick_ml != 'Todos': df_f = df_f[df_f['Calc_Pick_Prev_ML'] == f_prev_pick_ml]
-    if f_prev_opp_ml != 'Todos': df_f = df_f[df_f['Calc_Opp_Prev_ML'] == f_prev_opp_ml]
-    if f_prev_pick_ou != 'Todos': df_f = df_f[df_f['Calc_Pick_Prev_OU'] == f_prev_pick_ou]
-    if f_prev_opp_ou != 'Todos': df_f = df_f[df_f['Calc_Opp_Prev_OU'] == f_prev_opp_ou]
-
-    df_f['WIN_FLAG'] = df_f['Resultado ATS'] == 'SI'
-    df_f['ML_FLAG'] = df_f['Resultado ML'] == 'SI'
-
-elif modo_analisis == "🌍 Tendencias de Equipo (Mercado)":
-    # 1. Filtro Equipo
-    if f_target_team != 'Todos':
-        df_f = df_f[(df_f['HomeTeam'] == f_target_team) | (df_f['AwayTeam'] == f_target_team)]
-    
-    # 2. Filtro Rol y Clasificación Específica
-    if f_role == "Local (Home)":
-        if f_target_team != 'Todos': df_f = df_f[df_f['HomeTeam'] == f_target_team]
-        if f_status_team_class != 'Todos': df_f = df_f[df_f['Real_Home_Class'] == f_status_team_class] # Filtra por "Favorito Pesado", etc.
-            
-    elif f_role == "Visita (Away)":
-        if f_target_team != 'Todos': df_f = df_f[df_f['AwayTeam'] == f_target_team]
-        if f_status_team_class != 'Todos': df_f = df_f[df_f['Real_Away_Class'] == f_status_team_class]
-    
-    else: # Rol = Todos
-        if f_target_team != 'Todos' and f_status_team_class != 'Todos':
-            df_f = df_f[
-                ((df_f['HomeTeam']==f_target_team) & (df_f['Real_Home_Class']==f_status_team_class)) |
-                ((df_f['AwayTeam']==f_target_team) & (df_f['Real_Away_Class']==f_status_team_class))
-            ]
-
-    # Situacional (Home/Away)
-    if f_travel_pick != 'Todos': df_f = df_f[df_f['Calc_Home_Travel'] == f_travel_pick]
-    if f_travel_opp != 'Todos': df_f = df_f[df_f['Calc_Away_Travel'] == f_travel_opp]
-    if f_prev_pick_ats != 'Todos': df_f = df_f[df_f['Calc_Home_Prev_ATS'] == f_prev_pick_ats]
-    if f_prev_opp_ats != 'Todos': df_f = df_f[df_f['Calc_Away_Prev_ATS'] == f_prev_opp_ats]
-    if f_prev_pick_ml != 'Todos': df_f = df_f[df_f['Calc_Home_Prev_ML'] == f_prev_pick_ml]
-    if f_prev_opp_ml != 'Todos': df_f = df_f[df_f['Calc_Away_Prev_ML'] == f_prev_opp_ml]
-
-    # Flags Ganador
-    if f_target_team != 'Todos':
-        df_f['WIN_FLAG'] = df_f.apply(lambda r: r['Real_Home_Covered'] if r['HomeTeam']==f_target_team else r['Real_Away_Covered'], axis=1)
-        df_f['ML_FLAG'] = df_f.apply(lambda r: r['Real_Home_Won'] if r['HomeTeam']==f_target_team else r['Real_Away_Won'], axis=1)
+# El motor combina los bitmaps de todos los filtros activos y hace una sola
+# selección de filas sobre df (ver motor.py). Desde las particiones no se
+# materializan las filas: métricas y gráficos salen de agregados por bloques,
+# la tabla lee posiciones + su página y el backtest sus columnas a pedido
+en_disco = isinstance(motor, MotorDisco)
+with inst.etapa('filtros') as e:
+    spec = {
+        'modo': modo_analisis,
+        'equipo': f_equipo, 'condicion': f_condicion, 'confianza': f_confianza, 'ml': f_ml,
+        'target_team': f_target_team, 'role': f_role, 'status_team_class': f_status_team_class,
+        'travel_pick': f_travel_pick, 'travel_opp': f_travel_opp,
+        'prev_pick_ats': f_prev_pick_ats, 'prev_opp_ats': f_prev_opp_ats,
+        'prev_pick_ml': f_prev_pick_ml, 'prev_opp_ml': f_prev_opp_ml,
+        'prev_pick_ou': f_prev_pick_ou, 'prev_opp_ou': f_prev_opp_ou,
+        'h2h': f_h2h, 'streak_h': f_streak_h_lbl, 'streak_a': f_streak_a_lbl,
+        'rest_h': f_rest_h, 'rest_a': f_rest_a, 'tipo': f_tipo, 'linea': f_linea,
+        'ats_ult_h': f_ats_ult_h, 'ats_ult_a': f_ats_ult_a, 'ml_ult_h': f_ml_ult_h, 'ml_ult_a': f_ml_ult_a,
+        'ats_rol_h': f_ats_rol_h, 'ats_rol_a': f_ats_rol_a,
+        'juegos_dias_h': f_juegos_dias_h, 'juegos_dias_a': f_juegos_dias_a,
+        'b2b_dias_h': f_b2b_dias_h, 'b2b_dias_a': f_b2b_dias_a,
+    }
+    if en_disco:
+        df_f = None
+        (total, ats_wins, ml_wins, overs), graf = motor.agregados(spec)
     else:
-        df_f['WIN_FLAG'] = df_f['Real_Home_Covered'] # Default Home
-        df_f['ML_FLAG'] = df_f['Real_Home_Won']
-
-# Comunes
-def aplicar_filtro_racha(dframe, col_name, label_filtro):
-    if label_filtro == 'Todos': return dframe
-    try: num = int(label_filtro.split('+')[0]) 
-    except: return dframe
-    if "Victorias" in label_filtro: return dframe[dframe[col_name] >= num]
-    elif "Derrotas" in label_filtro: return dframe[dframe[col_name] <= -num]
-    return dframe
-
-df_f = aplicar_filtro_racha(df_f, 'Calc_Home_Streak', f_streak_h_lbl)
-df_f = aplicar_filtro_racha(df_f, 'Calc_Away_Streak', f_streak_a_lbl)
-
-if f_rest_h != 'Todos': df_f = df_f[df_f['Calc_Home_Rest'] == f_rest_h]
-if f_rest_a != 'Todos': df_f = df_f[df_f['Calc_Away_Rest'] == f_rest_a]
-if f_tipo != 'Todos': df_f = df_f[df_f['Tipo de Partido'] == f_tipo]
-if f_linea != 'Todos': df_f = df_f[df_f['Nivel de Línea'] == f_linea]
-if f_ml != 'Todos': df_f = df_f[df_f['Tipo de Momio'] == f_ml]
+        df_f = motor.filtrar(spec)
+        total = len(df_f)
+    e['filas'] = total
 
 # ==============================================================================
 # 6. DASHBOARD
 # ==============================================================================
-st.markdown(f"### 📊 Resultados ({len(df_f)} Partidos)")
+st.markdown(f"### 📊 Resultados ({total} Partidos)")
+
+if os.path.exists(ARCHIVO_ESCANER):
+    with st.expander("🔎 Situaciones del Escáner (mejor IC 95% inferior de ATS primero)"), inst.etapa('escaner'):
+        esc = cargar_escaner(ARCHIVO_ESCANER, os.path.getmtime(ARCHIVO_ESCANER))
+        esc = esc[esc['modo'] == modo_analisis]
+        rol = [COLUMNA_ROL] if COLUMNA_ROL in esc.columns and modo_analisis == "🌍 Tendencias de Equipo (Mercado)" else []
+        columnas_esc = ['n_dims'] + rol + DIMENSIONES[modo_analisis] + COLUMNAS_METRICAS + [c for c in COLUMNAS_ESTADISTICA if c in esc.columns]
+        st.dataframe(esc[columnas_esc].head(200), use_container_width=True, hide_index=True)
 
-total = len(df_f)
 if total > 0:
-    ats_wins = df_f['WIN_FLAG'].sum()
-    ats_rate = (ats_wins / total * 100)
-    roi = ((ats_wins * 90.91 - (total - ats_wins) * 100) / (total * 100) * 100)
-    ml_wins = df_f['ML_FLAG'].sum()
-    ml_rate = (ml_wins / total * 100)
-    over_rate = (len(df_f[df_f['Resultado O/U']=='Over']) / total * 100)
+    with inst.etapa('metricas'):
+        if en_disco:
+            m = metricas_conteos(total, ats_wins, ml_wins, overs)
+        else:
+            ats_wins, ml_wins = df_f['WIN_FLAG'].sum(), df_f['ML_FLAG'].sum()
+            m = metricas(df_f)
+        # IC 95% (Wilson / bootstrap) y p-valor contra el break-even
+        est = intervalos(total, ats_wins, ml_wins)
+    ats_rate, ml_rate, roi, over_rate = m['ats_pct'], m['ml_pct'], m['roi'], m['over_pct']
 
     c1, c2, c3, c4, c5 = st.columns(5)
     c1.metric("Partidos", total)
-    c2.metric("Win Rate ATS", f"{ats_rate:.1f}%", delta=f"{ats_rate-52.4:.1f}%", delta_color="normal" if ats_rate>52.4 else "inverse")
+    c2.metric("Win Rate ATS", f"{ats_rate:.1f}%", delta=f"{ats_rate-BREAK_EVEN:.1f}%", delta_color="normal" if ats_rate>BREAK_EVEN else "inverse")
     c3.metric("Moneyline (ML)", f"{ml_rate:.1f}%", delta="Ganador")
     c4.metric("ROI (ATS)", f"{roi:.1f}%", delta="Positivo" if roi>0 else "Negativo")
     c5.metric("O/U Tendencia", "OVER" if over_rate > 50 else "UNDER", f"{max(over_rate, 100-over_rate):.1f}%")
+    st.caption(f"IC 95% · ATS {est['ats_lo']:.1f}–{est['ats_hi']:.1f}% (p = {est['p_ats']:.3f} vs {BREAK_EVEN}%) · "
+               f"ML {est['ml_lo']:.1f}–{est['ml_hi']:.1f}% (p = {est['p_ml']:.3f}) · ROI {est['roi_lo']:.1f}% a {est['roi_hi']:.1f}%")
 
-    if ats_rate >= 60 and total >= 5: st.success(f"🔥 **ALERTA ATS:** {ats_rate:.1f}% Win Rate")
+    # La alerta pide evidencia: ATS por encima del break-even con p < ALFA
+    if significativo(est['p_ats']): st.success(f"🔥 **ALERTA ATS:** {ats_rate:.1f}% Win Rate (IC 95% {est['ats_lo']:.1f}–{est['ats_hi']:.1f}%, p = {est['p_ats']:.3f} < {ALFA})")
 
-    tab1, tab2 = st.tabs(["📉 Gráficos", "📋 Tabla Completa (Excel)"])
+    tab1, tab2, tab3 = st.tabs(["📉 Gráficos", "📋 Tabla Completa (Excel)", "📈 Backtest"])
     
-    with tab1:
+    with tab1, inst.etapa('graficos'):
+        # Se agrega en pandas (o por bloques desde las particiones); Altair solo
+        # recibe las filas de resumen
+        if not en_disco: graf = resumenes(df_f)
+        sujeto = "Pick" if modo_analisis == "🤖 Rendimiento del Modelo" else ("Equipo" if f_target_team != 'Todos' else "Local")
         g1, g2 = st.columns(2)
-        with g1:
-            df_chart = pd.DataFrame({'R': ['Cubrió', 'Falló'], 'V': [ats_wins, total-ats_wins]})
-            st.altair_chart(alt.Chart(df_chart).mark_arc(innerRadius=60).encode(
-                theta=alt.Theta("V", stack=True), color=alt.Color("R", scale=alt.Scale(range=['#00c853', '#ff5252']))
-            ), use_container_width=True)
-        with g2:
-            st.altair_chart(alt.Chart(df_f).mark_bar().encode(
-                x="count()", y=alt.Y("Resultado O/U", sort="-x"), color="Resultado O/U"
-            ), use_container_width=True)
-
-    with tab2:
-        def style_ats(val): return f'background-color: {"rgba(46, 204, 113, 0.2)" if val=="SI" else "rgba(231, 76, 60, 0.2)"}'
-        def style_streak(val):
-            try:
-                v = int(val)
-                if v >= 3: return 'color: #2ecc71; font-weight: bold' 
-                if v <= -3: return 'color: #e74c3c; font-weight: bold'
-            except: pass
-            return ''
-
-        st.dataframe(
-            df_f.style
-            .applymap(style_streak, subset=['Calc_Home_Streak', 'Calc_Away_Streak'])
-            .applymap(style_ats, subset=['Resultado ATS']),
-            use_container_width=True
-        )
+        with g1: st.altair_chart(chart_ats(resumen_ats(ats_wins, total)), use_container_width=True)
+        with g2: st.altair_chart(chart_ou(graf['ou']), use_container_width=True)
+
+        g3, g4, g5 = st.columns(3)
+        with g3: st.altair_chart(chart_ats_por(graf['rest'], 'Rest', ORDEN_REST, f"Descanso ({sujeto})"), use_container_width=True)
+        with g4: st.altair_chart(chart_ats_por(graf['viaje'], 'Viaje', ORDEN_TRAVEL, f"Viaje ({sujeto})"), use_container_width=True)
+        with g5: st.altair_chart(chart_ats_por(graf['mes'], 'Mes'), use_container_width=True)
+
+    with tab2, inst.etapa('tabla') as e_tabla:
+        # Orden y paginación del lado del servidor: solo la página visible
+        # pasa por el Styler y viaja al navegador
+        todas = [c for c in (motor.columnas if en_disco else df_f.columns) if c not in COLUMNAS_MOTOR]
+        columnas = st.multiselect("Columnas", todas, default=todas, key="tbl_cols") or todas
+        o1, o2, o3, o4 = st.columns([3, 1, 1, 1])
+        with o1: orden = st.selectbox("Ordenar por", ['(Fecha del archivo)'] + columnas, key="tbl_orden")
+        with o2: ascendente = st.toggle("Ascendente", value=True, key="tbl_asc")
+        with o3: tam_pagina = st.selectbox("Filas", TAMANOS_PAGINA, index=1, key="tbl_tam")
+        paginas = num_paginas(total, tam_pagina)
+        with o4: num_pagina = st.number_input(f"Página (de {paginas})", 1, paginas, 1, key="tbl_pag")
+
+        orden = None if orden == '(Fecha del archivo)' else orden
+        if en_disco:
+            # Se ordenan solo las posiciones y la columna clave; las filas de la página se leen por _fila
+            claves = motor.claves(spec, [] if orden is None else [orden])
+            pag = motor.filas(pagina(claves, [], orden, ascendente, tam_pagina, num_pagina).index, columnas)
+        else:
+            pag = pagina(df_f, columnas, orden, ascendente, tam_pagina, num_pagina)
+        st.dataframe(estilo_pagina(pag), use_container_width=True)
+        e_tabla['filas'] = len(pag)
+
+        # Exportación del resultado completo (sin estilos, por bloques)
+        e1, e2 = st.columns([1, 3])
+        with e1: formato = st.radio("Exportar", ["CSV", "Parquet"], horizontal=True, key="tbl_fmt")
+        with e2:
+            if st.button(f"⬇️ Preparar {formato} ({total} filas)", key="tbl_exp"):
+                with inst.etapa('exportar') as e:
+                    e['filas'] = total
+                    datos = motor.filas(claves.index, columnas) if en_disco else df_f[columnas]
+                    if formato == "CSV":
+                        st.download_button("Descargar CSV", exportar_csv(datos), "resultados.csv", "text/csv")
+                    else:
+                        st.download_button("Descargar Parquet", exportar_parquet(datos), "resultados.parquet", "application/octet-stream")
+
+    with tab3, inst.etapa('backtest'):
+        # Walk-forward en orden de fecha: curva de unidades, drawdown y meses
+        mercados = ["ATS (-110)"] + (["ML (momio del pick)"] if modo_analisis == "🤖 Rendimiento del Modelo" else [])
+        b1, b2 = st.columns([2, 1])
+        with b1: mercado = st.radio("Mercado", mercados, horizontal=True, key="bt_mercado")
+        with b2: apuesta = st.number_input("Apuesta por partido", min_value=1.0, value=float(APUESTA), step=10.0, key="bt_apuesta")
+        # Desde las particiones la curva necesita cada partido del filtro: sus columnas se leen a pedido
+        if en_disco and st.toggle(f"Calcular backtest ({total} partidos)", key="bt_disco"):
+            df_f = motor.filtrar(spec, columnas=COLUMNAS_BACKTEST)
+        if df_f is not None:
+            if mercado.startswith("ML"): curva = backtest.curva(df_f, 'ML_FLAG', apuesta, 'Momio_Seleccion')
+            else: curva = backtest.curva(df_f, 'WIN_FLAG', apuesta)
+            bt = backtest.resumen(curva)
+            if mercado.startswith("ML"):
+                # Pago variable: remuestreo de filas (2000 × n), solo a pedido
+                ic_roi = None
+                if st.button("Calcular IC 95% del ROI (bootstrap)", key="bt_ic"):
+                    ic_roi = bootstrap_roi(curva['ganancia'].to_numpy(), curva['apuesta'].to_numpy())[:2]
+            else:
+                # Pago fijo: el ROI no depende del monto, es el IC de la sección 6 (bootstrap_roi_fijo)
+                ic_roi = est['roi_lo'], est['roi_hi']
+
+            k1, k2, k3, k4 = st.columns(4)
+            k1.metric("Apuestas", bt['apuestas'])
+            k2.metric("Unidades", f"{bt['unidades']:+.2f}")
+            k3.metric("ROI", f"{bt['roi']:.1f}%", None if ic_roi is None else f"IC 95% {ic_roi[0]:.1f}% a {ic_roi[1]:.1f}%", delta_color="off")
+            k4.metric("Max Drawdown", f"{bt['max_drawdown']:.2f} u")
+            st.altair_chart(chart_curva(backtest.por_dia(curva)), use_container_width=True)
+            st.dataframe(backtest.por_mes(curva), use_container_width=True, hide_index=True)
 else:
 
     st.warning("⚠️ No hay datos.")
+
+# ==============================================================================
+# 7. INSTRUMENTACIÓN
+# ==============================================================================
+if inst.activa:
+    with st.sidebar.expander("⏱️ Instrumentación (esta corrida)"):
+        st.dataframe(pd.DataFrame(inst.tabla()).astype({'Filas': 'Int64'}), use_container_width=True, hide_index=True)
+        st.caption(f"Total: {sum(r['seg'] for r in inst.registros) * 1000:.0f} ms · corrida {inst.corrida}")
+        st.caption(f"Datos: versión de las {time.strftime('%H:%M:%S', time.localtime(recargador.cargado_en))}, "
+                   f"construida en {recargador.segundos:.1f} s en segundo plano · {recargador.recargas} carga(s)")
+    inst.guardar()
@@ -0,0 +1,317 @@
+# ==============================================================================
+# ALMACÉN DEL DATASET PROCESADO
+# ==============================================================================
+# Cache en disco del df procesado (todas las columnas Calc_* / Real_* y
+# Fecha_Str) en Parquet, junto con el estado por equipo (el equivalente de
+# team_history / team_streaks) al cierre de la última fecha.
+#
+# Cada versión del cache es una subcarpeta (carpeta/<hash fuentes>_<versión
+# features>/) con las partes Parquet y el estado: se escribe en una carpeta
+# temporal única (tempfile.mkdtemp) y entra con un solo rename, así nunca se
+# ve un Parquet de una versión con el estado de otra, ni con dos cargas a la
+# vez. El puntero ARCHIVO_ACTUAL dice cuál es la última (de ahí sigue la
+# carga incremental); se conservan VERSIONES_CONSERVADAS por si alguien las lee.
+#
+# - Si el hash del archivo fuente y la versión del código de features coinciden
+#   con lo guardado, se lee el Parquet directamente (sin abrir el Excel).
+# - Si el Excel solo agrega partidos nuevos (las filas hasta la última fecha
+#   guardada, el watermark, tienen los hashes guardados), solo las filas
+#   nuevas pasan por preparar_base y features; las ventanas leen de la
+#   historia solo el horizonte de los equipos que juegan
+#   (calcular_ventanas_nuevas), y las filas nuevas se escriben como una parte
+#   Parquet más: las anteriores entran a la versión nueva con hard links.
+#   Al llegar a MAX_PARTES se reescribe todo en una sola.
+# - En cualquier otro caso se recalcula todo.
+#
+# La fuente puede ser un archivo, una carpeta o un glob de libros / CSV (uno
+# por temporada o por casa de apuestas): se leen en paralelo, se unen sin
+# partidos repetidos (Fecha + Local + Visita) y se procesan como una sola historia,
+# así el estado por equipo sigue de un archivo al siguiente.
+#
+# El df que devuelve usa dtypes compactos (ver compactar) y se comparte tal
+# cual entre sesiones: tratarlo como de solo lectura.
+# ==============================================================================
+import glob
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from features import (VERSION_FEATURES, equipos_partido, preparar_base, calcular_features, calcular_ventanas,
+                      calcular_ventanas_nuevas, extraer_estado)
+
+CARPETA_CACHE = '.cache_v14'
+ARCHIVO_PARTE = 'procesado-{:03d}.parquet'
+MAX_PARTES = 8
+ARCHIVO_ESTADO = 'estado_equipos.pkl'
+ARCHIVO_ACTUAL = 'actual.txt'    # Nombre de la subcarpeta de la última versión
+VERSIONES_CONSERVADAS = 2
+EXTENSIONES_FUENTE = ('.xlsx', '.xls', '.csv')
+CLAVE_PARTIDO = ['Fecha', 'Partido (Local vs Visitante)']
+
+# Columnas de pocas etiquetas que se guardan como category (códigos int8):
+# viaje, descanso, clasificación, previos SI/NO/N/A y Over/Under/N/A, y las
+# etiquetas de mercado / resultado del Excel. Los equipos quedan como texto
+# (se comparan entre columnas).
+COLUMNAS_CATEGORIA = [
+    'Calc_Home_Travel', 'Calc_Away_Travel', 'Calc_Pick_Travel', 'Calc_Opp_Travel',
+    'Calc_Home_Rest', 'Calc_Away_Rest',
+    'Real_Home_Class', 'Real_Away_Class',
+    'Calc_Home_Prev_ATS', 'Calc_Away_Prev_ATS', 'Calc_Pick_Prev_ATS', 'Calc_Opp_Prev_ATS',
+    'Calc_Home_Prev_ML', 'Calc_Away_Prev_ML', 'Calc_Pick_Prev_ML', 'Calc_Opp_Prev_ML',
+    'Calc_Home_Prev_OU', 'Calc_Away_Prev_OU', 'Calc_Pick_Prev_OU', 'Calc_Opp_Prev_OU',
+    'Resultado ATS', 'Resultado ML', 'Resultado O/U', 'EsLocal', 'OT',
+    'Confianza', 'Tipo de Momio', 'Tipo de Partido', 'Nivel de Línea', 'Situación B2B',
+    'Calc_Home_ATS_Ult', 'Calc_Away_ATS_Ult', 'Calc_Home_ML_Ult', 'Calc_Away_ML_Ult',
+    'Calc_Home_ATS_Rol', 'Calc_Away_ATS_Rol',
+]
+COLUMNAS_ENTERO_CHICO = ['Calc_Home_Streak', 'Calc_Away_Streak', 'H2H_Season',
+                         'Calc_Home_Juegos_Dias', 'Calc_Away_Juegos_Dias', 'Calc_Home_B2B_Dias', 'Calc_Away_B2B_Dias']
+
+
+def leer_fuente(ruta):
+    """Lee el Excel o CSV de origen según su extensión."""
+    if ruta.lower().endswith('.csv'): return pd.read_csv(ruta)
+    return pd.read_excel(ruta)
+
+
+def _leer_normalizado(ruta):
+    # Corre en el pool: lectura (openpyxl es de un solo hilo) + nombres de columna
+    df = leer_fuente(ruta)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def listar_fuentes(ruta):
+    """Archivos de datos de `ruta`: el archivo mismo, los de una carpeta o los que coinciden con un glob."""
+    if os.path.isdir(ruta):
+        rutas = [os.path.join(ruta, f) for f in os.listdir(ruta)]
+    elif glob.has_magic(ruta):
+        rutas = glob.glob(ruta)
+    else:
+        return [ruta] if os.path.exists(ruta) else []
+    # Sin temporales de Excel (~$libro.xlsx)
+    return sorted(r for r in rutas if os.path.isfile(r) and r.lower().endswith(EXTENSIONES_FUENTE)
+                  and not os.path.basename(r).startswith('~$'))
+
+
+def leer_fuentes(rutas, workers=None):
+    """
+    Lee y une varias fuentes en un pool de procesos. Un partido repetido
+    (misma Fecha, Local y Visita) se queda con la versión del último archivo en
+    orden alfabético. El orden por fecha lo pone preparar_base.
+    """
+    if len(rutas) == 1: return _leer_normalizado(rutas[0])
+    workers = min(len(rutas), workers or os.cpu_count() or 1)
+    if workers == 1:
+        partes = [_leer_normalizado(r) for r in rutas]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool: partes = list(pool.map(_leer_normalizado, rutas))
+    df = pd.concat(partes, ignore_index=True)
+    if 'Fecha' in df.columns: df['Fecha'] = pd.to_datetime(df['Fecha'])
+    if all(c in df.columns for c in CLAVE_PARTIDO):
+        # El texto del partido trae los momios de cada casa ("LAL (+120) vs GSW (-140)"):
+        # la clave son los equipos; si no se reconocen, el texto completo
+        texto = df[CLAVE_PARTIDO[1]].astype(str).str.strip()
+        home, away = equipos_partido(df[CLAVE_PARTIDO[1]])
+        clave = pd.DataFrame({'f': df['Fecha'], 'h': home.fillna(texto), 'a': away.fillna('')})
+        df = df[~clave.duplicated(keep='last').to_numpy()].reset_index(drop=True)
+    return df
+
+
+def hash_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def hash_fuentes(rutas):
+    """Hash del conjunto de fuentes (con una sola, igual a hash_archivo)."""
+    if len(rutas) == 1: return hash_archivo(rutas[0])
+    h = hashlib.sha256()
+    for r in rutas: h.update(f"{os.path.basename(r)}:{hash_archivo(r)}\n".encode())
+    return h.hexdigest()
+
+
+def _hash_filas(df):
+    """Hash de cada fila de la fuente (uint64), para detectar ediciones a partidos viejos."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def compactar(df):
+    """
+    Convierte a dtypes compactos sin cambiar valores ni etiquetas: category en
+    COLUMNAS_CATEGORIA (con 'N/A' entre las categorías si hay nulos, para que
+    fillna("N/A") siga funcionando) y el entero más chico que alcance (int8
+    para rachas) en COLUMNAS_ENTERO_CHICO. Idempotente.
+    """
+    cambios = {}
+    for col in COLUMNAS_CATEGORIA:
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype): continue
+        cat = df[col].astype('category')
+        if cat.hasnans and 'N/A' not in cat.cat.categories: cat = cat.cat.add_categories('N/A')
+        cambios[col] = cat
+    for col in COLUMNAS_ENTERO_CHICO:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col].dtype):
+            cambios[col] = pd.to_numeric(df[col], downcast='integer')
+    if not cambios: return df
+    attrs = dict(df.attrs)
+    df = df.assign(**cambios)
+    df.attrs.update(attrs)
+    return df
+
+
+def _nombre_version(hash_fuente, hashes):
+    # Sin hash de archivo (df en memoria) la clave sale de los hashes de las filas
+    clave = hash_fuente or f"filas-{hashlib.sha256(hashes.tobytes()).hexdigest()[:16]}"
+    return re.sub(r'[^\w.-]+', '_', f"{clave}_{VERSION_FEATURES}")
+
+
+def _leer_version(ruta):
+    """Meta (estado, watermark, partes, ...) de la subcarpeta `ruta`, con 'ruta' agregada; None si falta o es de otra versión."""
+    try:
+        meta = pd.read_pickle(os.path.join(ruta, ARCHIVO_ESTADO))
+    except Exception:
+        return None
+    if meta.get('version') != VERSION_FEATURES: return None
+    if not all(os.path.exists(os.path.join(ruta, p)) for p in meta['partes']): return None
+    meta['ruta'] = ruta
+    return meta
+
+
+def _leer_procesado(meta):
+    partes = [pd.read_parquet(os.path.join(meta['ruta'], p)) for p in meta['partes']]
+    # Cada parte trae sus propias categorías: compactar las vuelve a unir
+    return compactar(partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True))
+
+
+def _leer_previo(carpeta):
+    """Meta de la última versión guardada en `carpeta` (la del puntero)."""
+    try:
+        with open(os.path.join(carpeta, ARCHIVO_ACTUAL), encoding='utf-8') as f: nombre = f.read().strip()
+    except OSError:
+        return None
+    return _leer_version(os.path.join(carpeta, nombre)) if nombre else None
+
+
+def _guardar(meta, carpeta, previas, nuevas):
+    """
+    Arma en una carpeta temporal única las partes `previas` (rutas de otra
+    versión, con hard links) más `nuevas` (df, o None) como parte siguiente y
+    el estado, y la renombra a su subcarpeta de versión; después mueve el
+    puntero y borra versiones viejas. Si otra carga ya dejó esa misma
+    versión, se queda la suya.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    destino = os.path.join(carpeta, _nombre_version(meta['hash_fuente'], meta['hashes']))
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=carpeta)
+    try:
+        partes = []
+        for ruta in previas:
+            partes.append(os.path.basename(ruta))
+            try: os.link(ruta, os.path.join(tmp, partes[-1]))
+            except OSError: shutil.copy2(ruta, os.path.join(tmp, partes[-1]))
+        if nuevas is not None and len(nuevas):
+            partes.append(ARCHIVO_PARTE.format(len(partes)))
+            nuevas.to_parquet(os.path.join(tmp, partes[-1]), index=False)
+        pd.to_pickle({**meta, 'partes': partes}, os.path.join(tmp, ARCHIVO_ESTADO))
+        if not os.path.isdir(destino):
+            try: os.rename(tmp, destino)
+            except OSError:
+                if not os.path.isdir(destino): raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    fd, puntero = tempfile.mkstemp(prefix='.tmp-', dir=carpeta)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f: f.write(os.path.basename(destino))
+    os.replace(puntero, os.path.join(carpeta, ARCHIVO_ACTUAL))
+    _limpiar_versiones(carpeta, destino)
+
+
+def _limpiar_versiones(carpeta, actual):
+    # Solo subcarpetas de versión (traen ARCHIVO_ESTADO): en la carpeta del
+    # cache también viven las particiones y el escáner
+    versiones = [os.path.join(carpeta, n) for n in os.listdir(carpeta) if not n.startswith('.tmp-')]
+    versiones = sorted((r for r in versiones if os.path.isfile(os.path.join(r, ARCHIVO_ESTADO)) and r != actual),
+                       key=os.path.getmtime, reverse=True)
+    for ruta in versiones[VERSIONES_CONSERVADAS - 1:]: shutil.rmtree(ruta, ignore_errors=True)
+
+
+def procesar(base, estado=None):
+    """Features + Fecha_Str sobre un df ya preparado (preparar_base)."""
+    df = calcular_features(base, estado)
+    df['Fecha_Str'] = df['Fecha'].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def cargar_incremental(df_fuente, carpeta=CARPETA_CACHE, hash_fuente=None, reanudar=True):
+    """
+    Devuelve el df procesado completo. Si lo guardado en `carpeta` coincide con
+    las filas del Excel hasta su watermark, solo procesa los partidos nuevos;
+    si hubo cambios en la historia (ediciones, partidos atrasados, columnas
+    distintas) o si reanudar=False, recalcula todo. En ambos casos deja el
+    cache actualizado.
+    """
+    df_fuente.columns = df_fuente.columns.str.strip()
+    if 'Fecha' in df_fuente.columns: df_fuente['Fecha'] = pd.to_datetime(df_fuente['Fecha'])
+    columnas = list(df_fuente.columns)
+    hashes = _hash_filas(df_fuente)
+    meta = _leer_previo(carpeta)
+    df = None
+
+    if reanudar and meta is not None and meta['columnas'] == columnas and not df_fuente['Fecha'].isna().any():
+        viejo = (df_fuente['Fecha'] <= meta['watermark']).to_numpy()
+        # Guardados ordenados: una edición, un borrado o un partido atrasado cambian el multiconjunto
+        if np.array_equal(np.sort(hashes[viejo]), meta['hashes']):
+            df = _leer_procesado(meta)
+            previas, nuevas, estado = [os.path.join(meta['ruta'], p) for p in meta['partes']], None, meta['estado']
+            if not viejo.all():
+                nuevas = procesar(preparar_base(df_fuente[~viejo].reset_index(drop=True)), estado)
+                nuevas = calcular_ventanas_nuevas(df, nuevas)
+                estado = extraer_estado(nuevas).combine_first(estado)
+                df = compactar(pd.concat([df, nuevas], ignore_index=True).infer_objects())
+                if len(previas) < MAX_PARTES: nuevas = compactar(nuevas)
+                else: previas, nuevas = [], df
+
+    if df is None:
+        df = procesar(preparar_base(df_fuente))
+        estado = extraer_estado(df)
+        df = compactar(calcular_ventanas(df))
+        previas, nuevas = [], df
+
+    _guardar({
+        'version': VERSION_FEATURES,
+        'hash_fuente': hash_fuente,
+        'watermark': df_fuente['Fecha'].max(),
+        'hashes': np.sort(hashes),
+        'columnas': columnas,
+        'estado': estado,
+    }, carpeta, previas, nuevas)
+    return df
+
+
+def cargar_dataset(ruta, carpeta=CARPETA_CACHE, incremental=True, workers=None):
+    """
+    Punto de entrada del loader: devuelve el df procesado de `ruta` (archivo,
+    carpeta o glob), usando el cache de `carpeta` cuando el hash de las
+    fuentes y la versión de features coinciden con una versión guardada.
+    """
+    rutas = listar_fuentes(ruta)
+    if not rutas: raise FileNotFoundError(f"Sin archivos de datos en '{ruta}'")
+    hash_fuente = hash_fuentes(rutas)
+    meta = _leer_version(os.path.join(carpeta, _nombre_version(hash_fuente, None)))
+    if meta is not None:
+        df = _leer_procesado(meta)
+    else:
+        df = cargar_incremental(leer_fuentes(rutas, workers), carpeta, hash_fuente, reanudar=incremental)
+    df = compactar(df)  # caches escritos antes de compactar
+    # Identifica la versión del dataset (p. ej. para caches derivados como el índice de filtros)
+    df.attrs['version_dataset'] = f"{hash_fuente}:{VERSION_FEATURES}"
+    return df
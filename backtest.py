@@ -0,0 +1,198 @@
+# ==============================================================================
+# BACKTEST WALK-FORWARD
+# ==============================================================================
+# Recorre las apuestas de una selección en orden de fecha y arma la curva de
+# unidades / ROI acumulados, el drawdown máximo y el desglose por mes. Apuesta
+# y momio pueden variar por fila (escalar, columna o array); sin momio se usa
+# el pago fijo de metricas.py (-110), así el ROI final coincide con la
+# sección 6. Todo es cumsum / maximum.accumulate, sin ciclos por apuesta.
+# Las unidades son la ganancia dividida entre una unidad base fija (`unidad`,
+# APUESTA por defecto): con otro monto por partido las unidades escalan con
+# él, y con montos variables la curva sigue la misma ganancia que el ROI.
+#
+# backtest_lote hace lo mismo para muchas selecciones a la vez (hits del
+# escáner, filtros guardados) con sumas segmentadas en una sola pasada.
+#
+# Uso:
+#   python backtest.py --spec-file consultas.json [--archivo datos.xlsx]
+#   python backtest.py --escaner [--top 200]
+# ==============================================================================
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from metricas import PAGO_ATS, APUESTA
+from filtros import MODO_MODELO
+from escaner import DIMENSIONES
+
+COLUMNAS_LOTE = ['apuestas', 'unidades', 'roi', 'max_drawdown']
+
+
+def pago_por_unidad(momio=None):
+    """Ganancia por 1 apostado: momio americano (escalar o array); None = pago fijo -110."""
+    if momio is None: return PAGO_ATS / APUESTA
+    m = np.asarray(momio, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        return np.where(m > 0, m / 100, 100 / np.abs(m))
+
+
+def _por_fila(valor, df, defecto=None):
+    """Escalar, nombre de columna de df o array -> array float por fila (o None)."""
+    if valor is None: return defecto
+    if isinstance(valor, str): return df[valor].to_numpy(dtype=np.float64)
+    return np.broadcast_to(np.asarray(valor, dtype=np.float64), (len(df),))
+
+
+def ganancias(gano, apuesta=APUESTA, momio=None):
+    """Ganancia (en $) de cada apuesta: apuesta * pago si ganó, -apuesta si no."""
+    gano = np.asarray(gano, dtype=bool)
+    apuesta = np.broadcast_to(np.asarray(apuesta, dtype=np.float64), gano.shape)
+    return np.where(gano, apuesta * pago_por_unidad(momio), -apuesta), apuesta
+
+
+def curva(df_f, flag='WIN_FLAG', apuesta=APUESTA, momio=None, unidad=APUESTA):
+    """
+    Una fila por apuesta en orden de fecha: ganancia, unidades (de `unidad`
+    $) y ROI acumulados y drawdown (unidades por debajo del máximo previo).
+    `apuesta` y `momio` aceptan escalar, nombre de columna o array.
+    """
+    orden = np.argsort(df_f['Fecha'].to_numpy(), kind='mergesort')
+    apuesta = _por_fila(apuesta, df_f)[orden]
+    momio = _por_fila(momio, df_f)
+    gan, apuesta = ganancias(df_f[flag].to_numpy(dtype=bool)[orden], apuesta, None if momio is None else momio[orden])
+    unidades = np.cumsum(gan) / unidad
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.cumsum(gan) / np.cumsum(apuesta) * 100
+    pico = np.maximum.accumulate(np.concatenate([[0.0], unidades]))[1:]
+    return pd.DataFrame({
+        'Fecha': df_f['Fecha'].to_numpy()[orden],
+        'apuesta': apuesta, 'ganancia': gan, 'gano': df_f[flag].to_numpy(dtype=bool)[orden],
+        'unidades': unidades, 'roi': roi, 'drawdown': pico - unidades,
+    })
+
+
+def resumen(c):
+    """Apuestas, unidades finales, ROI final y drawdown máximo (unidades) de una curva."""
+    if not len(c): return {'apuestas': 0, 'unidades': 0.0, 'roi': float('nan'), 'max_drawdown': 0.0}
+    return {'apuestas': len(c), 'unidades': float(c['unidades'].iloc[-1]),
+            'roi': float(c['roi'].iloc[-1]), 'max_drawdown': float(c['drawdown'].max())}
+
+
+def por_dia(c):
+    """Último punto de la curva por fecha (lo que se grafica)."""
+    return c.groupby('Fecha', sort=True)[['unidades', 'roi', 'drawdown']].last().reset_index()
+
+
+def por_mes(c, unidad=APUESTA):
+    """Apuestas, ganadas, unidades (de `unidad` $) y ROI por mes."""
+    g = c.assign(Mes=c['Fecha'].dt.strftime('%Y-%m'), Unidades=c['ganancia'] / unidad).groupby('Mes', sort=True).agg(
+        Apuestas=('gano', 'size'), Ganadas=('gano', 'sum'), Unidades=('Unidades', 'sum'),
+        Ganancia=('ganancia', 'sum'), Apostado=('apuesta', 'sum'))
+    g['ROI %'] = g['Ganancia'] / g['Apostado'] * 100
+    g['Unidades Acum.'] = g['Unidades'].cumsum()
+    return g.reset_index()[['Mes', 'Apuestas', 'Ganadas', 'Unidades', 'ROI %', 'Unidades Acum.']]
+
+
+# ==============================================================================
+# LOTES (ESCÁNER / FILTROS GUARDADOS)
+# ==============================================================================
+def backtest_lote(fechas, gano, selecciones, apuesta=APUESTA, momio=None, unidad=APUESTA):
+    """
+    Resumen (COLUMNAS_LOTE) de muchas selecciones de filas sobre los mismos
+    arrays base. `selecciones` es una lista de arrays de posiciones. Las
+    curvas se calculan segmentadas: una cumsum global menos el acumulado al
+    inicio de cada selección, y el máximo previo con un cummax agrupado.
+    """
+    fechas = np.asarray(fechas)
+    n = len(fechas)
+    gan, apu = ganancias(gano, np.broadcast_to(np.asarray(apuesta, dtype=np.float64), (n,)),
+                         None if momio is None else np.broadcast_to(np.asarray(momio, dtype=np.float64), (n,)))
+    largos = np.array([len(s) for s in selecciones], dtype=np.int64)
+    if not largos.sum():
+        return pd.DataFrame({'apuestas': largos, 'unidades': 0.0, 'roi': np.nan, 'max_drawdown': 0.0})
+    # Cada selección en orden de fecha (estable), una detrás de otra
+    filas = np.concatenate([s[np.argsort(fechas[s], kind='mergesort')] for s in selecciones]).astype(np.int64)
+    grupo = np.repeat(np.arange(len(selecciones)), largos)
+    inicio = np.concatenate([[0], np.cumsum(largos)[:-1]])
+
+    g = gan[filas]
+    u = g / unidad
+    acum = np.cumsum(u)
+    base = np.concatenate([[0.0], acum])[inicio]
+    unidades = acum - np.repeat(base, largos)
+    pico = np.maximum(pd.Series(unidades).groupby(grupo).cummax().to_numpy(), 0.0)
+
+    total = np.bincount(grupo, weights=g, minlength=len(selecciones))
+    apostado = np.bincount(grupo, weights=apu[filas], minlength=len(selecciones))
+    max_dd = np.zeros(len(selecciones))
+    np.maximum.at(max_dd, grupo, pico - unidades)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = total / apostado * 100
+    return pd.DataFrame({'apuestas': largos, 'unidades': np.bincount(grupo, weights=u, minlength=len(selecciones)),
+                         'roi': roi, 'max_drawdown': max_dd})
+
+
+def backtest_escaner(df, esc, indice):
+    """
+    Agrega COLUMNAS_LOTE (prefijo bt_) a los hits del escáner: cada fila se
+    traduce a sus bitmaps del índice de filtros, con los mismos flags que usa
+    escaner.py (pick en modo modelo, local en modo equipo).
+    """
+    dims = [d for d in dict.fromkeys(d for ds in DIMENSIONES.values() for d in ds) if d in esc.columns]
+    if not len(esc): return esc.assign(**{f'bt_{c}': pd.Series(dtype=float) for c in COLUMNAS_LOTE})
+    res = []
+    for modo, hits in esc.groupby('modo', sort=False):
+        if modo == MODO_MODELO: gano = (df['Resultado ATS'] == 'SI').to_numpy()
+        else: gano = df['Real_Home_Covered'].to_numpy(dtype=bool)
+        selecciones = [indice.seleccionar([indice.bitmap(d, v) for d, v in fila.items() if v != 'Todos'])
+                       for fila in hits[dims].to_dict('records')]
+        bt = backtest_lote(df['Fecha'].to_numpy(), gano, selecciones)
+        res.append(bt.set_axis(hits.index))
+    return esc.join(pd.concat(res).add_prefix('bt_'))
+
+
+def backtest_specs(motor, specs, apuesta=APUESTA, momio=None):
+    """COLUMNAS_LOTE por cada spec del motor (filtros guardados), sobre WIN_FLAG."""
+    if not specs: return pd.DataFrame(columns=COLUMNAS_LOTE)
+    filas, selecciones, inicio = [], [], 0
+    for spec in specs:
+        df_f = motor.filtrar(spec)
+        filas.append(df_f)
+        selecciones.append(np.arange(inicio, inicio + len(df_f)))
+        inicio += len(df_f)
+    todo = pd.concat(filas, ignore_index=True)
+    return backtest_lote(todo['Fecha'].to_numpy(), todo['WIN_FLAG'].to_numpy(dtype=bool), selecciones,
+                         _por_fila(apuesta, todo), _por_fila(momio, todo))
+
+
+def main(argv=None):
+    from almacen import cargar_dataset
+    from escaner import ARCHIVO_ESCANER
+    from motor import ARCHIVO, Motor
+
+    ap = argparse.ArgumentParser(description="Backtest walk-forward por lotes (filtros guardados o hits del escáner).")
+    ap.add_argument('--archivo', default=ARCHIVO)
+    ap.add_argument('--spec-file', help="JSON con una lista de specs del motor")
+    ap.add_argument('--escaner', action='store_true', help=f"Backtest de los hits de {ARCHIVO_ESCANER}")
+    ap.add_argument('--top', type=int, default=200, help="Hits del escáner a evaluar")
+    ap.add_argument('--apuesta', type=float, default=APUESTA)
+    args = ap.parse_args(argv)
+    if not args.spec_file and not args.escaner: ap.error("Indica --spec-file o --escaner")
+
+    motor = Motor(cargar_dataset(args.archivo))
+    if args.spec_file:
+        with open(args.spec_file, encoding='utf-8') as f: specs = json.load(f)
+        specs = specs if isinstance(specs, list) else [specs]
+        res = backtest_specs(motor, specs, args.apuesta)
+        for spec, fila in zip(specs, res.to_dict('records')): print(json.dumps({'spec': spec, **fila}, ensure_ascii=False))
+    if args.escaner:
+        if not os.path.exists(ARCHIVO_ESCANER): ap.error(f"No existe {ARCHIVO_ESCANER}; corre escaner.py primero")
+        esc = pd.read_parquet(ARCHIVO_ESCANER).head(args.top)
+        print(backtest_escaner(motor.df, esc, motor.indice).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# ==============================================================================
+# BENCHMARK POR ETAPAS
+# ==============================================================================
+# Mide tiempo y pico de memoria de cada etapa del pipeline por separado, sobre
+# libros sintéticos (generar_datos.py) de varios tamaños:
+#
+#   leer_excel   -> leer_fuente (pd.read_excel / read_csv)
+#   preparar     -> preparar_base: fechas, orden y HomeTeam / AwayTeam (equipos_partido)
+#   features     -> procesar: calcular_features + Fecha_Str
+#   ventanas     -> calcular_ventanas (récords y conteos por equipo)
+#   compactar    -> compactar (category / enteros chicos)
+#   indice       -> Motor (índice de filtros + tabla equipo-partido)
+#   filtros      -> cadena de filtros de la sección 5 (CONSULTAS)
+#   tabla_graf   -> métricas, resúmenes + spec de Altair y primera página con estilo
+#
+# leer_excel -> compactar es la carga completa de cargar_dataset sin caché.
+#
+# Los tiempos salen de corridas sin tracemalloc (su overhead infla mucho las
+# etapas con muchos objetos pequeños); el pico de memoria sale de una corrida
+# aparte con tracemalloc (asignaciones de Python/NumPy/pandas dentro de la
+# etapa). Con --comparar se marcan las etapas que empeoraron más que
+# --tolerancia respecto a una corrida guardada con --json.
+#
+# Uso:
+#   python benchmark.py [--partidos 1230,12300,123000] [--repeticiones 3]
+#                       [--csv] [--json salida.json] [--comparar base.json]
+# ==============================================================================
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from almacen import compactar, leer_fuente, procesar
+from features import calcular_ventanas, preparar_base
+from generar_datos import PARTIDOS_POR_TEMPORADA, generar, escribir
+from graficos import resumen_ats, resumen_ou, ats_por, ats_por_mes, chart_ats, chart_ou, chart_ats_por
+from motor import Motor, metricas
+from tabla import pagina, estilo_pagina
+
+ETAPAS = ['leer_excel', 'preparar', 'features', 'ventanas', 'compactar', 'indice', 'filtros', 'tabla_graf']
+
+# Consultas representativas de la sección 5 (una por patrón de uso)
+CONSULTAS = [
+    {'modo': 'modelo'},
+    {'modo': 'modelo', 'confianza': 'Alta (0.75-0.78)', 'condicion': 'SI'},
+    {'modo': 'modelo', 'travel_pick': 'V-V (Gira)', 'rest_h': '0', 'streak_a': '3+ Derrotas (❄️)'},
+    {'modo': 'equipo'},
+    {'modo': 'equipo', 'role': 'Local (Home)', 'status_team_class': 'Favorito Ligero (-110 a -170)'},
+    {'modo': 'equipo', 'target_team': 'BOS', 'prev_pick_ats': 'SI'},
+]
+
+
+def medir(func, *args):
+    """(resultado, segundos, pico en MB) de una llamada; pico 0 si tracemalloc no está activo."""
+    memoria = tracemalloc.is_tracing()
+    if memoria:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    res = func(*args)
+    seg = time.perf_counter() - t0
+    pico = (tracemalloc.get_traced_memory()[1] - base) / 2**20 if memoria else 0.0
+    return res, seg, pico
+
+
+def _filtros(motor):
+    return [motor.filtrar(spec) for spec in CONSULTAS]
+
+
+def _tabla_graf(resultados):
+    for df_f in resultados:
+        m = metricas(df_f)
+        if m['partidos'] == 0: continue
+        chart_ats(resumen_ats(int(df_f['WIN_FLAG'].sum()), m['partidos'])).to_dict()
+        chart_ou(resumen_ou(df_f)).to_dict()
+        chart_ats_por(ats_por(df_f['PERS_REST'], df_f['WIN_FLAG'], 'Descanso'), 'Descanso').to_dict()
+        chart_ats_por(ats_por(df_f['PERS_TRAVEL'], df_f['WIN_FLAG'], 'Viaje'), 'Viaje').to_dict()
+        chart_ats_por(ats_por_mes(df_f), 'Mes').to_dict()
+        estilo_pagina(pagina(df_f, list(df_f.columns), 'Fecha', False, 50, 1)).to_html()
+
+
+def correr(ruta, repeticiones=1):
+    """Mejor tiempo (de `repeticiones`) y pico de memoria de cada etapa sobre el libro `ruta`."""
+    tiempos = {e: [] for e in ETAPAS}
+    picos = {e: [] for e in ETAPAS}
+    def anotar(etapa, res):
+        valor, seg, pico = res
+        tiempos[etapa].append(seg)
+        picos[etapa].append(pico)
+        return valor
+
+    def pipeline():
+        df = anotar('leer_excel', medir(leer_fuente, ruta))
+        base = anotar('preparar', medir(preparar_base, df))
+        df = anotar('features', medir(procesar, base))
+        df = anotar('ventanas', medir(calcular_ventanas, df))
+        df = anotar('compactar', medir(compactar, df))
+        motor = anotar('indice', medir(Motor, df))
+        resultados = anotar('filtros', medir(_filtros, motor))
+        anotar('tabla_graf', medir(_tabla_graf, resultados))
+
+    for _ in range(repeticiones): pipeline()
+    tiempos_ok = {e: min(v) for e, v in tiempos.items()}
+    tracemalloc.start()
+    try:
+        pipeline()
+    finally:
+        tracemalloc.stop()
+    return {e: {'seg': tiempos_ok[e], 'mb': max(picos[e])} for e in ETAPAS}
+
+
+def comparar(actual, previo, tolerancia):
+    """Lista de (partidos, etapa, métrica, antes, ahora) que empeoraron más de `tolerancia`."""
+    regresiones = []
+    for n, etapas in actual.items():
+        for etapa, valores in etapas.items():
+            antes = previo.get(n, {}).get(etapa)
+            if not antes: continue
+            for k in ('seg', 'mb'):
+                if antes[k] > 0 and valores[k] > antes[k] * (1 + tolerancia):
+                    regresiones.append((n, etapa, k, antes[k], valores[k]))
+    return regresiones
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark por etapas del NBA Analyzer.")
+    ap.add_argument('--partidos', default=f"{PARTIDOS_POR_TEMPORADA},{PARTIDOS_POR_TEMPORADA * 10}",
+                    help="Tamaños separados por coma")
+    ap.add_argument('--repeticiones', type=int, default=3)
+    ap.add_argument('--semilla', type=int, default=7)
+    ap.add_argument('--csv', action='store_true', help="Generar CSV en vez de Excel")
+    ap.add_argument('--json', help="Guarda los resultados en este archivo")
+    ap.add_argument('--comparar', help="JSON de una corrida anterior")
+    ap.add_argument('--tolerancia', type=float, default=0.2)
+    args = ap.parse_args(argv)
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(x) for x in args.partidos.split(',')]:
+            ruta = os.path.join(tmp, f"sintetico_{n}.{'csv' if args.csv else 'xlsx'}")
+            escribir(generar(n, args.semilla), ruta)
+            resultados[str(n)] = r = correr(ruta, args.repeticiones)
+            print(f"\n{n} partidos")
+            for etapa in ETAPAS: print(f"  {etapa:<12} {r[etapa]['seg'] * 1000:>10.1f} ms {r[etapa]['mb']:>9.1f} MB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f: json.dump(resultados, f, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f: previo = json.load(f)
+        regresiones = comparar(resultados, previo, args.tolerancia)
+        for n, etapa, k, antes, ahora in regresiones:
+            print(f"REGRESIÓN {n} partidos / {etapa} / {k}: {antes:.3f} -> {ahora:.3f}")
+        if regresiones: return 1
+        print(f"\nSin regresiones (tolerancia {args.tolerancia:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+# ==============================================================================
+# ESCÁNER DE SITUACIONES (BATCH)
+# ==============================================================================
+# Recorre combinaciones de las dimensiones de filtro del sidebar (viaje,
+# descanso, previos ATS/ML/O-U, rachas, Tipo de Momio, Confianza, H2H_Season)
+# en ambos modos y calcula Partidos, ATS %, ML %, ROI y Over % de cada celda.
+#
+# Cada combinación de dimensiones se agrega en una sola pasada (tipo cubo: un
+# bincount sobre una clave combinada devuelve todas las celdas) y las
+# combinaciones se reparten en un pool de procesos. Cada celda lleva además
+# IC 95% y p-valor contra el break-even (estadistica.py). El resultado queda
+# rankeado en Parquet para que la app lo muestre: por el límite inferior del
+# IC del ATS (ats_lo), así un 5 de 5 no le gana a un 240 de 400; ats_pct y
+# partidos desempatan.
+#
+# Uso:
+#   python escaner.py [--archivo datos.xlsx] [--max-dims 3] [--min-partidos 5]
+#                     [--workers N] [--salida .cache_v14/escaner.parquet]
+# ==============================================================================
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from almacen import CARPETA_CACHE, cargar_dataset
+from filtros import COLUMNAS_RACHA, OPCIONES_RACHA, MODO_MODELO, MODO_EQUIPO, ROLES, mascara_racha
+from metricas import resumen
+from estadistica import COLUMNAS_ESTADISTICA, intervalos
+
+ARCHIVO_ESCANER = os.path.join(CARPETA_CACHE, 'escaner.parquet')
+
+# Dimensiones por modo: las mismas columnas que filtra la sección 5
+DIMENSIONES = {
+    MODO_MODELO: [
+        'Confianza', 'H2H_Season', 'Tipo de Momio',
+        'Calc_Pick_Travel', 'Calc_Opp_Travel',
+        'Calc_Pick_Prev_ATS', 'Calc_Opp_Prev_ATS',
+        'Calc_Pick_Prev_ML', 'Calc_Opp_Prev_ML',
+        'Calc_Pick_Prev_OU', 'Calc_Opp_Prev_OU',
+        'Calc_Home_Rest', 'Calc_Away_Rest',
+        'Calc_Home_Streak', 'Calc_Away_Streak',
+    ],
+    # Sin equipo objetivo: perspectiva del local, como el dashboard. La clase
+    # del local solo filtra con rol Local: las celdas la llevan en COLUMNA_ROL
+    MODO_EQUIPO: [
+        'H2H_Season', 'Real_Home_Class',
+        'Calc_Home_Travel', 'Calc_Away_Travel',
+        'Calc_Home_Prev_ATS', 'Calc_Away_Prev_ATS',
+        'Calc_Home_Prev_ML', 'Calc_Away_Prev_ML',
+        'Calc_Home_Rest', 'Calc_Away_Rest',
+        'Calc_Home_Streak', 'Calc_Away_Streak',
+    ],
+}
+
+COLUMNAS_METRICAS = ['partidos', 'ats_pct', 'ml_pct', 'roi', 'over_pct']
+# Rol del spec que reproduce la celda ('role' del motor): "Local (Home)" si
+# filtra Real_Home_Class en modo equipo, 'Todos' en el resto
+COLUMNA_ROL = 'rol'
+ORDEN_RANKING = ['ats_lo', 'ats_pct', 'partidos']
+
+# Estado por proceso (se llena en _iniciar_worker)
+_TABLAS = {}
+_RACHAS = {}
+
+
+def preparar_tablas(df):
+    """
+    Por modo: cada dimensión como códigos enteros (valores normalizados como en
+    el selectbox) y los flags de resultado. Las rachas van aparte en formato
+    CSR (fila -> opciones): un partido con racha 5 pertenece a "3+", "4+" y
+    "5+ Victorias", igual que en el filtro del sidebar.
+    """
+    tablas = {}
+    over = (df['Resultado O/U'] == 'Over').to_numpy(np.float64)
+    flags = {
+        MODO_MODELO: ((df['Resultado ATS'] == 'SI').to_numpy(np.float64), (df['Resultado ML'] == 'SI').to_numpy(np.float64)),
+        MODO_EQUIPO: (df['Real_Home_Covered'].to_numpy(np.float64), df['Real_Home_Won'].to_numpy(np.float64)),
+    }
+    for modo, dims in DIMENSIONES.items():
+        ats, ml = flags[modo]
+        codigos = {}
+        for d in dims:
+            if d in COLUMNAS_RACHA or d not in df.columns: continue
+            cod, uniques = pd.factorize(df[d].fillna("N/A").astype(str))
+            codigos[d] = (cod.astype(np.int64), np.asarray(uniques, dtype=object))
+        tablas[modo] = {'n': len(df), 'ats': ats, 'ml': ml, 'over': over, 'codigos': codigos}
+
+    rachas = {}
+    opciones = np.asarray(OPCIONES_RACHA[1:], dtype=object)
+    for col in COLUMNAS_RACHA:
+        if col not in df.columns: continue
+        m = np.column_stack([mascara_racha(df[col], label) for label in opciones])
+        filas, cod = np.nonzero(m)  # ordenado por fila
+        starts = np.concatenate([[0], np.cumsum(m.sum(axis=1))])
+        rachas[col] = (starts, cod.astype(np.int64), opciones)
+    return tablas, rachas
+
+
+def _iniciar_worker(tablas, rachas):
+    _TABLAS.update(tablas)
+    _RACHAS.update(rachas)
+
+
+def _agregar(modo, dims, min_partidos):
+    """
+    Todas las celdas de una combinación de dimensiones en una pasada: clave
+    mixta (radix) por fila y np.bincount para partidos / ATS / ML / Over.
+    """
+    t = _TABLAS[modo]
+    idx = np.arange(t['n'])
+    clave = np.zeros(t['n'], dtype=np.int64)
+    cards, uniques = [], []
+    for d in dims:
+        if d in _RACHAS:
+            # Expande cada fila a todas las opciones de racha que cumple
+            starts, cod_racha, opciones = _RACHAS[d]
+            c = np.diff(starts)[idx]
+            base = np.repeat(starts[idx], c)
+            pos = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)
+            idx, clave = np.repeat(idx, c), np.repeat(clave, c)
+            cod = cod_racha[base + pos]
+        else:
+            cod_col, opciones = t['codigos'][d]
+            cod = cod_col[idx]
+        clave = clave * len(opciones) + cod
+        cards.append(len(opciones))
+        uniques.append(opciones)
+
+    celdas, inversa = np.unique(clave, return_inverse=True)
+    partidos = np.bincount(inversa, minlength=len(celdas))
+    ats = np.bincount(inversa, weights=t['ats'][idx], minlength=len(celdas))
+    ml = np.bincount(inversa, weights=t['ml'][idx], minlength=len(celdas))
+    over = np.bincount(inversa, weights=t['over'][idx], minlength=len(celdas))
+    ok = partidos >= min_partidos
+
+    g = {'modo': modo, 'n_dims': len(dims)}
+    resto = celdas[ok]
+    valores = {}
+    for d, card, opciones in reversed(list(zip(dims, cards, uniques))):
+        valores[d] = opciones[resto % card]
+        resto = resto // card
+    g.update({d: valores[d] for d in dims})
+    g.update({'partidos': partidos[ok], 'ats': ats[ok], 'ml': ml[ok], 'over': over[ok]})
+    return pd.DataFrame(g)
+
+
+def _agregar_lote(lote):
+    return [_agregar(modo, dims, min_partidos) for modo, dims, min_partidos in lote]
+
+
+def escanear(df, max_dims=3, min_partidos=5, workers=None, modos=None):
+    """
+    Devuelve un df rankeado (rankear) con una columna por dimensión ('Todos'
+    si esa dimensión no se filtra) y las métricas de cada celda.
+    """
+    tablas, rachas = preparar_tablas(df)
+    modos = modos or list(DIMENSIONES)
+    tareas = []
+    for modo in modos:
+        dims = [d for d in DIMENSIONES[modo] if d in tablas[modo]['codigos'] or d in rachas]
+        for k in range(1, max_dims + 1):
+            tareas.extend((modo, combo, min_partidos) for combo in combinations(dims, k))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _iniciar_worker(tablas, rachas)
+        partes = _agregar_lote(tareas)
+    else:
+        tam = max(1, len(tareas) // (workers * 4))
+        lotes = [tareas[i:i + tam] for i in range(0, len(tareas), tam)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=(tablas, rachas)) as pool:
+            partes = [g for res in pool.map(_agregar_lote, lotes) for g in res]
+
+    partes = [p for p in partes if len(p)]
+    todas_dims = list(dict.fromkeys(d for m in modos for d in DIMENSIONES[m]))
+    columnas = ['modo', 'n_dims', COLUMNA_ROL] + todas_dims + COLUMNAS_METRICAS + COLUMNAS_ESTADISTICA
+    if not partes: return pd.DataFrame(columns=columnas)
+
+    res = pd.concat(partes, ignore_index=True)
+    for d in todas_dims:
+        if d not in res.columns: res[d] = 'Todos'
+        else: res[d] = res[d].fillna('Todos')
+    m = resumen(res['partidos'], res['ats'], res['ml'], res['over'])
+    for k in COLUMNAS_METRICAS: res[k] = m[k]
+    est = intervalos(res['partidos'].to_numpy(), res['ats'].round().to_numpy(), res['ml'].round().to_numpy())
+    for k in COLUMNAS_ESTADISTICA: res[k] = est[k]
+    clase_local = (res['modo'] == MODO_EQUIPO) & (res['Real_Home_Class'] != 'Todos') if 'Real_Home_Class' in res.columns else False
+    res[COLUMNA_ROL] = np.where(clase_local, ROLES[1], 'Todos')
+    return rankear(res[columnas])
+
+
+def rankear(res):
+    """Mejor límite inferior del IC 95% del ATS primero (ORDEN_RANKING); lo que tenga de esas columnas."""
+    orden = [c for c in ORDEN_RANKING if c in res.columns]
+    return res.sort_values(orden, ascending=False, kind='mergesort').reset_index(drop=True)
+
+
+def guardar_escaneo(res, ruta=ARCHIVO_ESCANER):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    res.to_parquet(ruta + '.tmp', index=False)
+    os.replace(ruta + '.tmp', ruta)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Escáner de combinaciones de filtros (ATS / ML / ROI / O-U).")
+    ap.add_argument('--archivo', default='datos.xlsx', help="Archivo, carpeta o glob de libros / CSV")
+    ap.add_argument('--max-dims', type=int, default=3)
+    ap.add_argument('--min-partidos', type=int, default=5)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--salida', default=ARCHIVO_ESCANER)
+    args = ap.parse_args(argv)
+
+    res = escanear(cargar_dataset(args.archivo), args.max_dims, args.min_partidos, args.workers)
+    guardar_escaneo(res, args.salida)
+    print(f"{len(res)} situaciones con >= {args.min_partidos} partidos -> {args.salida}")
+    print(res.head(10).to_string())
+
+
+if __name__ == '__main__':
+    main()
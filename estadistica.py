@@ -0,0 +1,129 @@
+# ==============================================================================
+# INTERVALOS DE CONFIANZA Y P-VALORES
+# ==============================================================================
+# Un 4 de 5 y un 240 de 400 no pesan igual. Para cada ATS % / ML % se calcula
+# el intervalo de Wilson y el p-valor (binomial exacta, una cola) contra el
+# break-even de 52.4%; el ROI lleva un intervalo bootstrap. Todo es
+# vectorizado: las funciones aceptan escalares o arrays (una celda del
+# dashboard o miles de celdas del escáner) y los remuestreos se hacen en lote.
+# ==============================================================================
+import numpy as np
+
+from metricas import BREAK_EVEN, roi_ats
+
+Z_95 = 1.959963984540054
+ALFA = 0.05           # Nivel para la alerta / significancia
+REMUESTREOS = 2000
+P_BREAK_EVEN = BREAK_EVEN / 100
+MAX_ELEMENTOS = 4_000_000  # Tope de elementos por bloque en los remuestreos
+
+COLUMNAS_ESTADISTICA = ['ats_lo', 'ats_hi', 'p_ats', 'ml_lo', 'ml_hi', 'p_ml', 'roi_lo', 'roi_hi']
+
+
+def wilson(k, n, z=Z_95):
+    """Intervalo de Wilson para k éxitos en n, en % (NaN si n = 0)."""
+    k, n = np.asarray(k, dtype=np.float64), np.asarray(n, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = k / n
+        centro = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+        margen = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+    return (centro - margen) * 100, (centro + margen) * 100
+
+
+def p_valor(k, n, p0=P_BREAK_EVEN):
+    """
+    P(X >= k) con X ~ Binomial(n, p0): una cola, "mejor que el break-even".
+    Exacta. Se suma la cola del lado de k que queda lejos de la media (k en
+    adelante si k >= n·p0; si no, 1 - P(X <= k-1)) y solo 12·sqrt(n) términos
+    (lo que sigue es < 1e-30), así el costo es O(celdas · sqrt(n)) aun para
+    miles de celdas.
+    """
+    escalar = np.ndim(k) == 0 and np.ndim(n) == 0
+    k, n = np.broadcast_arrays(np.asarray(k, dtype=np.int64), np.asarray(n, dtype=np.int64))
+    forma = k.shape
+    k, n = k.ravel(), n.ravel()
+    out = np.full(len(k), np.nan)
+    ok = n > 0
+    if ok.any():
+        kk, nn = k[ok], n[ok]
+        log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, nn.max() + 1)))])
+        ancho = np.ceil(12 * np.sqrt(nn)).astype(np.int64) + 10
+        arriba = kk >= nn * p0
+        inicio = np.where(arriba, kk, np.maximum(kk - ancho, 0))
+        cuantos = np.maximum(np.where(arriba, np.minimum(nn - kk + 1, ancho), kk - inicio), 0)
+        celda = np.repeat(np.arange(len(kk)), cuantos)
+        j = inicio[celda] + np.arange(cuantos.sum()) - np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+        m = nn[celda]
+        log_pmf = log_fact[m] - log_fact[j] - log_fact[m - j] + j * np.log(p0) + (m - j) * np.log1p(-p0)
+        cola = np.bincount(celda, weights=np.exp(log_pmf), minlength=len(kk))
+        out[ok] = np.clip(np.where(arriba, cola, 1 - cola), 0.0, 1.0)
+    return float(out[0]) if escalar else out.reshape(forma)
+
+
+def _percentiles(muestras, nivel):
+    a = (1 - nivel) / 2 * 100
+    return np.percentile(muestras, [a, 100 - a], axis=-1)
+
+
+def bootstrap_roi_fijo(k, n, remuestreos=REMUESTREOS, nivel=0.95, semilla=0):
+    """
+    Intervalo bootstrap del ROI ATS con pago fijo (-110), por celda. Con
+    resultados 0/1 remuestrear los n partidos equivale a sacar los aciertos
+    de una Binomial(n, k/n): B remuestreos por celda en una sola llamada.
+    Las celdas con el mismo (k, n) comparten remuestreo.
+    """
+    rng = np.random.default_rng(semilla)
+    k, n = np.broadcast_arrays(np.asarray(k, dtype=np.int64), np.asarray(n, dtype=np.int64))
+    forma = k.shape
+    pares, inversa = np.unique(np.column_stack([k.ravel(), n.ravel()]), axis=0, return_inverse=True)
+    kk, nn = pares[:, 0], np.maximum(pares[:, 1], 1)
+    lo, hi = np.empty(len(pares)), np.empty(len(pares))
+    por_bloque = max(1, MAX_ELEMENTOS // remuestreos)
+    for i in range(0, len(pares), por_bloque):
+        b = slice(i, i + por_bloque)
+        aciertos = rng.binomial(nn[b, None], (kk[b] / nn[b])[:, None], size=(len(nn[b]), remuestreos))
+        lo[b], hi[b] = _percentiles(roi_ats(nn[b, None], aciertos), nivel)
+    vacio = pares[:, 1] <= 0
+    lo, hi = np.where(vacio, np.nan, lo), np.where(vacio, np.nan, hi)
+    lo, hi = lo[inversa.ravel()].reshape(forma), hi[inversa.ravel()].reshape(forma)
+    return (float(lo), float(hi)) if not forma else (lo, hi)
+
+
+def bootstrap_roi(ganancias, apuestas, remuestreos=REMUESTREOS, nivel=0.95, semilla=0):
+    """
+    Intervalo bootstrap del ROI (%) de apuestas con pago / monto variable por
+    fila (p. ej. ML al momio del pick) y la fracción de remuestreos con ROI <= 0.
+    Los índices se sacan en bloques de hasta MAX_ELEMENTOS.
+    """
+    ganancias, apuestas = np.asarray(ganancias, dtype=np.float64), np.asarray(apuestas, dtype=np.float64)
+    n = len(ganancias)
+    if n == 0: return float('nan'), float('nan'), float('nan')
+    rng = np.random.default_rng(semilla)
+    por_bloque = max(1, MAX_ELEMENTOS // n)
+    rois = []
+    for inicio in range(0, remuestreos, por_bloque):
+        idx = rng.integers(0, n, size=(min(por_bloque, remuestreos - inicio), n))
+        rois.append(ganancias[idx].sum(axis=1) / apuestas[idx].sum(axis=1) * 100)
+    rois = np.concatenate(rois)
+    lo, hi = _percentiles(rois, nivel)
+    return float(lo), float(hi), float((rois <= 0).mean())
+
+
+def intervalos(partidos, ats_wins, ml_wins, semilla=0):
+    """
+    COLUMNAS_ESTADISTICA para una o muchas celdas: Wilson + p-valor de ATS y
+    ML contra 52.4%, e intervalo bootstrap del ROI ATS. Con pago fijo, ROI > 0
+    equivale a ATS > break-even, así que el p-valor del ROI es p_ats.
+    """
+    ats_lo, ats_hi = wilson(ats_wins, partidos)
+    ml_lo, ml_hi = wilson(ml_wins, partidos)
+    roi_lo, roi_hi = bootstrap_roi_fijo(ats_wins, partidos, semilla=semilla)
+    return {
+        'ats_lo': ats_lo, 'ats_hi': ats_hi, 'p_ats': p_valor(ats_wins, partidos),
+        'ml_lo': ml_lo, 'ml_hi': ml_hi, 'p_ml': p_valor(ml_wins, partidos),
+        'roi_lo': roi_lo, 'roi_hi': roi_hi,
+    }
+
+
+def significativo(p, alfa=ALFA):
+    return bool(p == p and p < alfa)
@@ -0,0 +1,575 @@
+# ==============================================================================
+# MOTOR DE FEATURES (V14)
+# ==============================================================================
+# Calcula las columnas Calc_* y Real_* de forma columnar: los partidos se
+# reorganizan en una tabla larga (una fila por equipo por partido) y las rachas,
+# descanso, viajes y resultados previos salen de operaciones agrupadas
+# (shift / cumsum) en lugar de un ciclo fila por fila.
+# ==============================================================================
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Ventanas de calcular_ventanas: últimos N partidos y últimos D días
+VENTANA_PARTIDOS = 5
+VENTANA_DIAS = 7
+
+# Subir al cambiar cualquier cálculo: invalida los caches en disco (almacen.py).
+# Incluye las ventanas para que cambiarlas también invalide.
+VERSION_FEATURES = f'14.2-{VENTANA_PARTIDOS}p{VENTANA_DIAS}d'
+
+FEATURE_COLS = [
+    # Rachas
+    'Calc_Home_Streak', 'Calc_Away_Streak',
+    # Rest y Viaje
+    'Calc_Home_Rest', 'Calc_Away_Rest',
+    'Calc_Home_Travel', 'Calc_Away_Travel',
+    'Calc_Pick_Travel', 'Calc_Opp_Travel',
+    # Previos Generales
+    'Calc_Home_Prev_ATS', 'Calc_Away_Prev_ATS',
+    'Calc_Home_Prev_ML', 'Calc_Away_Prev_ML',
+    'Calc_Home_Prev_OU', 'Calc_Away_Prev_OU',
+    # Previos Relativos al Pick
+    'Calc_Pick_Prev_ATS', 'Calc_Opp_Prev_ATS',
+    'Calc_Pick_Prev_ML', 'Calc_Opp_Prev_ML',
+    'Calc_Pick_Prev_OU', 'Calc_Opp_Prev_OU',
+    # Clasificación Real
+    'Real_Home_Class', 'Real_Away_Class',
+    # Flags
+    'Real_Home_Covered', 'Real_Away_Covered',
+    'Real_Home_Won', 'Real_Away_Won',
+]
+
+# Ventanas (calcular_ventanas): récord "G-P" en los últimos VENTANA_PARTIDOS
+# ("N/A" si aún no hay tantos), y conteos en los últimos VENTANA_DIAS días
+VENTANA_COLS = [
+    'Calc_Home_ATS_Ult', 'Calc_Away_ATS_Ult',
+    'Calc_Home_ML_Ult', 'Calc_Away_ML_Ult',
+    # Local: sus últimos N como local; Visita: sus últimos N como visita
+    'Calc_Home_ATS_Rol', 'Calc_Away_ATS_Rol',
+    'Calc_Home_Juegos_Dias', 'Calc_Away_Juegos_Dias',
+    'Calc_Home_B2B_Dias', 'Calc_Away_B2B_Dias',
+]
+
+
+def parse_teams(row):
+    try:
+        p = str(row['Partido (Local vs Visitante)']).strip()
+        parts = p.split(' vs ')
+        if len(parts) != 2: return None, None
+        h_match = re.match(r'^([A-Z]+)', parts[0].strip())
+        a_match = re.match(r'^([A-Z]+)', parts[1].strip())
+        if h_match and a_match:
+            return h_match.group(1), a_match.group(1)
+        return None, None
+    except:
+        return None, None
+
+
+def equipos_partido(partido):
+    """parse_teams vectorizado sobre la columna Partido: (HomeTeam, AwayTeam), NaN si no se reconoce."""
+    partes = partido.astype(str).str.strip().str.split(' vs ')
+    home = partes.str[0].str.strip().str.extract(r'^([A-Z]+)', expand=False)
+    away = partes.str[-1].str.strip().str.extract(r'^([A-Z]+)', expand=False)
+    valido = (partes.str.len() == 2) & home.notna() & away.notna()
+    return home.where(valido), away.where(valido)
+
+
+def invertir_clasificacion(texto):
+    """
+    Invierte la clasificación del Excel para el equipo contrario.
+    Ej: "Favorito Pesado" -> "Underdog Pesado"
+    """
+    if pd.isna(texto): return "N/A"
+    texto = str(texto)
+
+    if "Favorito" in texto:
+        return texto.replace("Favorito", "Underdog")
+    elif "Underdog" in texto:
+        return texto.replace("Underdog", "Favorito")
+    # Si dice Pick'em o algo neutro, se queda igual (o ajusta según tu excel)
+    return texto
+
+
+def _invertir_clasificacion_serie(serie):
+    """Versión columnar de invertir_clasificacion."""
+    es_na = serie.isna().to_numpy()
+    texto = serie.astype(object).where(~es_na, "").astype(str)
+    fav = texto.str.contains("Favorito", regex=False).to_numpy()
+    dog = texto.str.contains("Underdog", regex=False).to_numpy() & ~fav
+    out = texto.to_numpy(dtype=object).copy()
+    out[fav] = texto[fav].str.replace("Favorito", "Underdog", regex=False).to_numpy(dtype=object)
+    out[dog] = texto[dog].str.replace("Underdog", "Favorito", regex=False).to_numpy(dtype=object)
+    out[es_na] = "N/A"
+    return out
+
+
+# ==============================================================================
+# VERSIÓN COLUMNAR
+# ==============================================================================
+VIAJE_COMO_LOCAL = {"L-V (Sale)": "L-L (Homestand)", "V-V (Gira)": "V-L (Regresa)"}
+
+
+def _etiqueta_si_no(flag, hay_previo):
+    return np.where(hay_previo, np.where(flag, "SI", "NO"), "N/A").astype(object)
+
+
+def _tabla_larga(df, home_covered, home_won, estado=None):
+    """
+    Una fila por equipo por partido, en el orden en que el ciclo original
+    visitaba los partidos (primero el local, luego la visita).
+    Si se pasa `estado` (ver extraer_estado), cada equipo arranca con una fila
+    semilla (row = -1) que representa su último partido ya procesado.
+    En los partidos con local == visita (p. ej. None vs None) solo entra
+    la visita: el ciclo lee el mismo estado para los dos lados, guarda la
+    historia de la visita y la racha siempre queda como derrota.
+    """
+    n = len(df)
+    idx = np.arange(n)
+    ou = df['Resultado O/U'].to_numpy(dtype=object)
+    fecha = df['Fecha'].to_numpy()
+    home, away = df['HomeTeam'].to_numpy(dtype=object), df['AwayTeam'].to_numpy(dtype=object)
+    mismo = home == away
+    larga = pd.DataFrame({
+        'row': np.concatenate([idx, idx]),
+        'is_home': np.concatenate([np.ones(n, bool), np.zeros(n, bool)]),
+        'team': np.concatenate([home, away]),
+        'date': np.concatenate([fecha, fecha]),
+        'covered': np.concatenate([home_covered, ~home_covered]),
+        'won': np.concatenate([home_won, df['_away_won'].to_numpy()]),
+        # La racha usa "ganó el local o no": si no ganó el local, suma la visita
+        'streak_win': np.concatenate([home_won, ~home_won & ~mismo]),
+        'ou': np.concatenate([ou, ou]),
+        'seed_len': 1,
+    })[~np.concatenate([mismo, np.zeros(n, bool)])]
+    if estado is not None and len(estado):
+        semilla = pd.DataFrame({
+            'row': -1,
+            'is_home': estado['was_home'].to_numpy(dtype=bool),
+            'team': estado.index.to_numpy(dtype=object),
+            'date': estado['date'].to_numpy(dtype=fecha.dtype),
+            'covered': estado['covered'].to_numpy(dtype=bool),
+            'won': estado['won'].to_numpy(dtype=bool),
+            'streak_win': estado['streak'].to_numpy() > 0,
+            'ou': estado['ou'].to_numpy(dtype=object),
+            'seed_len': np.abs(estado['streak'].to_numpy()),
+        })
+        larga = pd.concat([semilla, larga], ignore_index=True)
+    # mergesort = estable: respeta el orden de las filas dentro de cada equipo
+    return larga.sort_values(['team', 'row'], kind='mergesort', na_position='last')
+
+
+def _estado_previo(larga):
+    """Agrega a la tabla larga las columnas del partido anterior de cada equipo."""
+    g = larga.groupby('team', sort=False, dropna=False)
+    hay_previo = (g.cumcount() > 0).to_numpy()
+
+    # Rachas: longitud de la corrida actual de victorias/derrotas
+    w = larga['streak_win'].to_numpy()
+    nuevo_grupo = ~hay_previo
+    cambio = nuevo_grupo.copy()
+    cambio[1:] |= w[1:] != w[:-1]
+    corrida = np.cumsum(cambio)
+    pos = pd.Series(corrida).groupby(corrida).cumcount().to_numpy() + 1
+    # Una corrida que empieza en la semilla continúa la racha guardada
+    inicio = np.flatnonzero(cambio)
+    pos += larga['seed_len'].to_numpy()[inicio][corrida - 1] - 1
+    racha_despues = np.where(w, pos, -pos)
+    racha_antes = np.zeros(len(larga), dtype=np.int64)
+    racha_antes[1:] = racha_despues[:-1]
+    racha_antes[nuevo_grupo] = 0
+
+    prev = g[['date', 'covered', 'won', 'ou', 'is_home']].shift(1)
+
+    delta = (larga['date'] - prev['date']).dt.days.to_numpy() - 1
+    with np.errstate(invalid='ignore'):
+        rest = np.where(delta < 0, "0", np.where(delta >= 3, "3+", pd.Series(delta).fillna(0).astype(np.int64).astype(str).to_numpy()))
+    rest = np.where(hay_previo, rest, "N/A").astype(object)
+
+    prev_home = prev['is_home'].fillna(False).to_numpy(dtype=bool)
+    now_home = larga['is_home'].to_numpy()
+    travel = np.select(
+        [prev_home & now_home, prev_home & ~now_home, ~prev_home & now_home],
+        ["L-L (Homestand)", "L-V (Sale)", "V-L (Regresa)"],
+        "V-V (Gira)",
+    ).astype(object)
+    travel = np.where(hay_previo, travel, "N/A").astype(object)
+
+    prev_ou = prev['ou'].to_numpy(dtype=object)
+    prev_ou = np.where(hay_previo, prev_ou, "N/A").astype(object)
+
+    out = pd.DataFrame({
+        'row': larga['row'].to_numpy(),
+        'is_home': now_home,
+        'streak': racha_antes,
+        'rest': rest,
+        'travel': travel,
+        'prev_ats': _etiqueta_si_no(prev['covered'].fillna(False).to_numpy(dtype=bool), hay_previo),
+        'prev_ml': _etiqueta_si_no(prev['won'].fillna(False).to_numpy(dtype=bool), hay_previo),
+        'prev_ou': prev_ou,
+    })
+    return out[out['row'] >= 0]
+
+
+def calcular_features(df, estado=None):
+    """
+    Calcula todas las columnas Calc_* / Real_* sobre un df ya ordenado por
+    'Fecha' y con HomeTeam / AwayTeam. Produce exactamente las mismas columnas
+    que el ciclo original (ver calcular_features_loop).
+
+    `estado` es el estado por equipo al cierre de los partidos anteriores
+    (extraer_estado); permite calcular solo los partidos nuevos.
+    """
+    df = df.copy()
+    home = df['HomeTeam'].to_numpy(dtype=object)
+    away = df['AwayTeam'].to_numpy(dtype=object)
+    pick = df['Selección Modelo'].to_numpy(dtype=object)
+    is_pick_home = pick == home
+
+    # --- CLASIFICACIÓN (ESPEJO) ---
+    if 'Tipo de Momio' in df.columns:
+        class_pick = df['Tipo de Momio'].to_numpy(dtype=object)
+        class_opp = _invertir_clasificacion_serie(df['Tipo de Momio'])
+    else:
+        class_pick = np.full(len(df), 'N/A', dtype=object)
+        class_opp = class_pick.copy()
+
+    # --- RESULTADOS ---
+    ats_hit = (df['Resultado ATS'] == 'SI').to_numpy()
+    ml_hit = (df['Resultado ML'] == 'SI').to_numpy()
+    home_covered = np.where(is_pick_home, ats_hit, ~ats_hit)
+    winner = np.where(ml_hit, pick, np.where(is_pick_home, away, home))
+    home_won = winner == home
+    away_won = winner == away
+    df['_away_won'] = away_won
+    # Sin equipos reconocibles (None vs None): ambos lados son la misma clave
+    mismo = home == away
+
+    # --- HISTORIA POR EQUIPO ---
+    estado = _estado_previo(_tabla_larga(df, home_covered, home_won, estado))
+    a = estado[~estado['is_home']].sort_values('row')
+    h = estado[estado['is_home']]
+    if mismo.any():
+        # El local ve el mismo estado que la visita; solo cambia que llega como local
+        h = pd.concat([h, a[mismo].assign(is_home=True, travel=a['travel'][mismo].replace(VIAJE_COMO_LOCAL))])
+    h = h.sort_values('row')
+
+    cols = {
+        'Calc_Home_Streak': h['streak'].to_numpy(), 'Calc_Away_Streak': a['streak'].to_numpy(),
+        'Calc_Home_Rest': h['rest'].to_numpy(), 'Calc_Away_Rest': a['rest'].to_numpy(),
+        'Calc_Home_Travel': h['travel'].to_numpy(), 'Calc_Away_Travel': a['travel'].to_numpy(),
+        'Calc_Home_Prev_ATS': h['prev_ats'].to_numpy(), 'Calc_Away_Prev_ATS': a['prev_ats'].to_numpy(),
+        'Calc_Home_Prev_ML': h['prev_ml'].to_numpy(), 'Calc_Away_Prev_ML': a['prev_ml'].to_numpy(),
+        'Calc_Home_Prev_OU': h['prev_ou'].to_numpy(), 'Calc_Away_Prev_OU': a['prev_ou'].to_numpy(),
+    }
+    # Relativos al Pick
+    for pick_col, opp_col, home_col, away_col in [
+        ('Calc_Pick_Travel', 'Calc_Opp_Travel', 'Calc_Home_Travel', 'Calc_Away_Travel'),
+        ('Calc_Pick_Prev_ATS', 'Calc_Opp_Prev_ATS', 'Calc_Home_Prev_ATS', 'Calc_Away_Prev_ATS'),
+        ('Calc_Pick_Prev_ML', 'Calc_Opp_Prev_ML', 'Calc_Home_Prev_ML', 'Calc_Away_Prev_ML'),
+        ('Calc_Pick_Prev_OU', 'Calc_Opp_Prev_OU', 'Calc_Home_Prev_OU', 'Calc_Away_Prev_OU'),
+    ]:
+        cols[pick_col] = np.where(is_pick_home, cols[home_col], cols[away_col])
+        cols[opp_col] = np.where(is_pick_home, cols[away_col], cols[home_col])
+
+    cols['Real_Home_Class'] = np.where(is_pick_home, class_pick, class_opp)
+    cols['Real_Away_Class'] = np.where(is_pick_home, class_opp, class_pick)
+    cols['Real_Home_Covered'] = home_covered
+    cols['Real_Away_Covered'] = ~home_covered
+    cols['Real_Home_Won'] = home_won
+    cols['Real_Away_Won'] = away_won
+
+    df = df.drop(columns='_away_won')
+    # Mismo orden de columnas y mismos dtypes que el ciclo (listas de Python)
+    for k in FEATURE_COLS:
+        v = cols[k]
+        df[k] = v.tolist() if v.dtype == object else v
+    return df
+
+
+# ==============================================================================
+# VENTANAS POR EQUIPO
+# ==============================================================================
+def _suma_ultimos(grupo, valores, n):
+    """
+    Por fila de una tabla ordenada por grupo: suma de `valores` en las n filas
+    anteriores del mismo grupo, y cuántas filas anteriores hay (máx. n).
+    Prefijos acumulados: O(filas) sin importar n.
+    """
+    pos = pd.Series(grupo).groupby(grupo).cumcount().to_numpy()
+    previas = np.minimum(pos, n)
+    acum = np.concatenate([[0], np.cumsum(valores)])
+    i = np.arange(len(valores))
+    return acum[i] - acum[i - previas], previas
+
+
+def _record(ganados, previas, n):
+    etiquetas = np.array([f"{g}-{n - g}" for g in range(n + 1)], dtype=object)
+    return np.where(previas >= n, etiquetas[np.minimum(ganados, n)], "N/A").astype(object)
+
+
+def calcular_ventanas(df, n=VENTANA_PARTIDOS, dias=VENTANA_DIAS):
+    """
+    Columnas VENTANA_COLS sobre un df ya procesado (calcular_features) y
+    ordenado por fecha. Todo sale de sumas acumuladas por equipo sobre la
+    tabla larga, O(partidos) para cualquier tamaño de ventana. Solo mira
+    partidos anteriores (sin el actual).
+    """
+    total = len(df)
+    if total == 0: return df.assign(**{k: np.array([], dtype=object) for k in VENTANA_COLS})
+    idx = np.arange(total)
+    fecha = df['Fecha'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    larga = pd.DataFrame({
+        'row': np.concatenate([idx, idx]),
+        'is_home': np.concatenate([np.ones(total, bool), np.zeros(total, bool)]),
+        'team': pd.factorize(np.concatenate([df['HomeTeam'].to_numpy(dtype=object), df['AwayTeam'].to_numpy(dtype=object)]))[0],
+        'dia': np.concatenate([fecha, fecha]),
+        'covered': np.concatenate([df['Real_Home_Covered'].to_numpy(dtype=bool), df['Real_Away_Covered'].to_numpy(dtype=bool)]),
+        'won': np.concatenate([df['Real_Home_Won'].to_numpy(dtype=bool), df['Real_Away_Won'].to_numpy(dtype=bool)]),
+    })
+    cols = {}
+
+    # Últimos n partidos del equipo
+    t = larga.sort_values(['team', 'row'], kind='mergesort')
+    equipo = t['team'].to_numpy()
+    ats, previas = _suma_ultimos(equipo, t['covered'].to_numpy(np.int64), n)
+    ml, _ = _suma_ultimos(equipo, t['won'].to_numpy(np.int64), n)
+    t = t.assign(ats_ult=_record(ats, previas, n), ml_ult=_record(ml, previas, n))
+
+    # Partidos y back-to-backs en los `dias` anteriores: ventana por fecha con
+    # searchsorted sobre la clave (equipo, día), creciente dentro de la tabla
+    dia = t['dia'].to_numpy()
+    nuevo = np.ones(len(t), bool)
+    nuevo[1:] = equipo[1:] != equipo[:-1]
+    b2b = np.zeros(len(t), np.int64)
+    b2b[1:] = (dia[1:] - dia[:-1] == 1) & ~nuevo[1:]
+    clave = equipo.astype(np.int64) * (dia.max() - dia.min() + dias + 2) + (dia - dia.min())
+    desde = np.searchsorted(clave, clave - dias, 'left')
+    i = np.arange(len(t))
+    acum_b2b = np.concatenate([[0], np.cumsum(b2b)])
+    t = t.assign(juegos_dias=i - desde, b2b_dias=acum_b2b[i] - acum_b2b[desde])
+
+    # Últimos n partidos en el mismo rol (local / visita)
+    r = larga.sort_values(['team', 'is_home', 'row'], kind='mergesort')
+    grupo = r['team'].to_numpy() * 2 + r['is_home'].to_numpy()
+    ats_rol, previas_rol = _suma_ultimos(grupo, r['covered'].to_numpy(np.int64), n)
+    r = r.assign(ats_rol=_record(ats_rol, previas_rol, n))
+
+    for lado, es_local in [('Home', True), ('Away', False)]:
+        a = t[t['is_home'].to_numpy() == es_local].sort_values('row')
+        b = r[r['is_home'].to_numpy() == es_local].sort_values('row')
+        cols[f'Calc_{lado}_ATS_Ult'] = a['ats_ult'].to_numpy()
+        cols[f'Calc_{lado}_ML_Ult'] = a['ml_ult'].to_numpy()
+        cols[f'Calc_{lado}_ATS_Rol'] = b['ats_rol'].to_numpy()
+        cols[f'Calc_{lado}_Juegos_Dias'] = a['juegos_dias'].to_numpy()
+        cols[f'Calc_{lado}_B2B_Dias'] = a['b2b_dias'].to_numpy()
+    return df.assign(**{k: cols[k] for k in VENTANA_COLS})
+
+
+def calcular_ventanas_nuevas(previo, nuevos, n=VENTANA_PARTIDOS, dias=VENTANA_DIAS):
+    """
+    calcular_ventanas de `nuevos` (partidos posteriores a todo `previo`) sin
+    recorrer la historia: de `previo` solo entran los últimos n partidos como
+    local y como visita de cada equipo que juega en `nuevos`, más todo lo de
+    los dias + 1 días anteriores (el día extra dice si el primer partido de
+    la ventana fue back-to-back). Mismo resultado que sobre previo + nuevos.
+    """
+    if not len(nuevos) or not len(previo): return calcular_ventanas(nuevos, n, dias)
+    columnas = ['Fecha', 'HomeTeam', 'AwayTeam', 'Real_Home_Covered', 'Real_Away_Covered', 'Real_Home_Won', 'Real_Away_Won']
+    equipos = pd.unique(np.concatenate([nuevos['HomeTeam'].to_numpy(dtype=object), nuevos['AwayTeam'].to_numpy(dtype=object)]))
+    usar = (previo['Fecha'] >= nuevos['Fecha'].min() - pd.Timedelta(days=dias + 1)).to_numpy(copy=True)
+    for col in ('HomeTeam', 'AwayTeam'):
+        lado = previo[col]
+        pos = np.flatnonzero(lado.isin(equipos).to_numpy())
+        ultimos = lado.iloc[pos].groupby(lado.iloc[pos], sort=False, dropna=False).cumcount(ascending=False) < n
+        usar[pos[ultimos.to_numpy()]] = True
+    tramo = pd.concat([previo.loc[usar, columnas], nuevos[columnas]], ignore_index=True)
+    ventanas = calcular_ventanas(tramo, n, dias)
+    return nuevos.assign(**{k: ventanas[k].to_numpy()[-len(nuevos):] for k in VENTANA_COLS})
+
+
+def extraer_estado(df):
+    """
+    Estado por equipo tras el último partido de un df ya procesado: el
+    equivalente columnar de los diccionarios team_history / team_streaks.
+    Índice = equipo; columnas date, covered, won, ou, was_home, streak.
+    """
+    n = len(df)
+    ou = df['Resultado O/U'].to_numpy(dtype=object)
+    home_won = df['Real_Home_Won'].to_numpy(dtype=bool)
+    home, away = df['HomeTeam'].to_numpy(dtype=object), df['AwayTeam'].to_numpy(dtype=object)
+    larga = pd.DataFrame({
+        'row': np.concatenate([np.arange(n), np.arange(n)]),
+        'team': np.concatenate([home, away]),
+        'date': np.concatenate([df['Fecha'].to_numpy(), df['Fecha'].to_numpy()]),
+        'covered': np.concatenate([df['Real_Home_Covered'].to_numpy(dtype=bool), df['Real_Away_Covered'].to_numpy(dtype=bool)]),
+        'won': np.concatenate([home_won, df['Real_Away_Won'].to_numpy(dtype=bool)]),
+        'ou': np.concatenate([ou, ou]),
+        'was_home': np.concatenate([np.ones(n, bool), np.zeros(n, bool)]),
+        # Local == visita (None vs None): el ciclo deja la racha como derrota
+        'streak_win': np.concatenate([home_won, ~home_won & (home != away)]),
+        'streak': np.concatenate([df['Calc_Home_Streak'].to_numpy(), df['Calc_Away_Streak'].to_numpy()]),
+    })
+    # Orden del ciclo: por partido, primero el local y luego la visita
+    ultimo = larga.sort_values('row', kind='mergesort').groupby('team', sort=True, dropna=False).tail(1)
+    s = ultimo['streak'].to_numpy()
+    w = ultimo['streak_win'].to_numpy()
+    ultimo = ultimo.assign(streak=np.where(w, np.where(s > 0, s + 1, 1), np.where(s < 0, s - 1, -1)))
+    return ultimo.set_index('team')[['date', 'covered', 'won', 'ou', 'was_home', 'streak']]
+
+
+# ==============================================================================
+# VERSIÓN DE REFERENCIA (CICLO ORIGINAL)
+# ==============================================================================
+def calcular_features_loop(df):
+    """
+    Implementación original fila por fila. Se conserva solo como referencia
+    para verificar_paridad(); la app usa calcular_features().
+    """
+    df = df.copy()
+    team_history = {}
+    team_streaks = {}
+    new_cols = {k: [] for k in FEATURE_COLS}
+
+    for idx, row in df.iterrows():
+        home, away = row['HomeTeam'], row['AwayTeam']
+        pick = row['Selección Modelo']
+        game_date = row['Fecha']
+
+        # --- LÓGICA DE CLASIFICACIÓN (ESPEJO) ---
+        class_pick = row.get('Tipo de Momio', 'N/A')
+        class_opp = invertir_clasificacion(class_pick)
+
+        if pick == home:
+            new_cols['Real_Home_Class'].append(class_pick)
+            new_cols['Real_Away_Class'].append(class_opp)
+        else: # Pick is Away
+            new_cols['Real_Away_Class'].append(class_pick)
+            new_cols['Real_Home_Class'].append(class_opp)
+
+        # --- RACHAS & HISTORIA (Standard) ---
+        h_streak = team_streaks.get(home, 0)
+        a_streak = team_streaks.get(away, 0)
+        new_cols['Calc_Home_Streak'].append(h_streak)
+        new_cols['Calc_Away_Streak'].append(a_streak)
+
+        h_last = team_history.get(home)
+        a_last = team_history.get(away)
+
+        def get_rest(last):
+            if not last: return "N/A"
+            delta = (game_date - last['date']).days - 1
+            return "0" if delta < 0 else "3+" if delta >= 3 else str(delta)
+
+        def get_travel(last, is_home_now):
+            if not last: return "N/A"
+            if last['was_home']: return "L-L (Homestand)" if is_home_now else "L-V (Sale)"
+            else: return "V-L (Regresa)" if is_home_now else "V-V (Gira)"
+
+        def get_prev_ats(last): return "SI" if last and last['covered'] else ("NO" if last else "N/A")
+        def get_prev_ml(last): return "SI" if last and last['won'] else ("NO" if last else "N/A")
+        def get_prev_ou(last): return last['ou'] if last else "N/A"
+
+        # Generales
+        h_trav = get_travel(h_last, True)
+        a_trav = get_travel(a_last, False)
+        new_cols['Calc_Home_Travel'].append(h_trav)
+        new_cols['Calc_Away_Travel'].append(a_trav)
+        new_cols['Calc_Home_Rest'].append(get_rest(h_last))
+        new_cols['Calc_Away_Rest'].append(get_rest(a_last))
+
+        new_cols['Calc_Home_Prev_ATS'].append(get_prev_ats(h_last))
+        new_cols['Calc_Away_Prev_ATS'].append(get_prev_ats(a_last))
+        new_cols['Calc_Home_Prev_ML'].append(get_prev_ml(h_last))
+        new_cols['Calc_Away_Prev_ML'].append(get_prev_ml(a_last))
+        new_cols['Calc_Home_Prev_OU'].append(get_prev_ou(h_last))
+        new_cols['Calc_Away_Prev_OU'].append(get_prev_ou(a_last))
+
+        # Relativos al Pick
+        if pick == home:
+            pick_last, opp_last = h_last, a_last
+            pick_trav, opp_trav = h_trav, a_trav
+        else:
+            pick_last, opp_last = a_last, h_last
+            pick_trav, opp_trav = a_trav, h_trav
+
+        new_cols['Calc_Pick_Travel'].append(pick_trav)
+        new_cols['Calc_Opp_Travel'].append(opp_trav)
+        new_cols['Calc_Pick_Prev_ATS'].append(get_prev_ats(pick_last))
+        new_cols['Calc_Opp_Prev_ATS'].append(get_prev_ats(opp_last))
+        new_cols['Calc_Pick_Prev_ML'].append(get_prev_ml(pick_last))
+        new_cols['Calc_Opp_Prev_ML'].append(get_prev_ml(opp_last))
+        new_cols['Calc_Pick_Prev_OU'].append(get_prev_ou(pick_last))
+        new_cols['Calc_Opp_Prev_OU'].append(get_prev_ou(opp_last))
+
+        # RESULTADOS
+        is_pick_home = (pick == home)
+        ats_hit = (row['Resultado ATS'] == 'SI')
+        ml_hit = (row['Resultado ML'] == 'SI')
+
+        if is_pick_home:
+            home_covered = ats_hit
+            away_covered = not ats_hit
+        else:
+            away_covered = ats_hit
+            home_covered = not ats_hit
+
+        if ml_hit: winner_team = pick
+        else: winner_team = away if is_pick_home else home
+
+        home_won = (winner_team == home)
+        away_won = (winner_team == away)
+
+        new_cols['Real_Home_Covered'].append(home_covered)
+        new_cols['Real_Away_Covered'].append(away_covered)
+        new_cols['Real_Home_Won'].append(home_won)
+        new_cols['Real_Away_Won'].append(away_won)
+
+        if home_won:
+            team_streaks[home] = h_streak + 1 if h_streak > 0 else 1
+            team_streaks[away] = a_streak - 1 if a_streak < 0 else -1
+        else:
+            team_streaks[away] = a_streak + 1 if a_streak > 0 else 1
+            team_streaks[home] = h_streak - 1 if h_streak < 0 else -1
+
+        team_history[home] = {'date': game_date, 'covered': home_covered, 'won': home_won, 'ou': row['Resultado O/U'], 'was_home': True}
+        team_history[away] = {'date': game_date, 'covered': away_covered, 'won': away_won, 'ou': row['Resultado O/U'], 'was_home': False}
+
+    for k, v in new_cols.items(): df[k] = v
+    return df
+
+
+# ==============================================================================
+# PREPARACIÓN Y PARIDAD
+# ==============================================================================
+def preparar_base(df):
+    """Limpieza previa común: columnas, fechas, orden y equipos."""
+    df.columns = df.columns.str.strip()
+    if 'Fecha' in df.columns: df['Fecha'] = pd.to_datetime(df['Fecha'])
+    df = df.sort_values('Fecha').reset_index(drop=True)
+    if 'HomeTeam' not in df.columns:
+        home, away = equipos_partido(df['Partido (Local vs Visitante)'])
+        equipos = pd.DataFrame({'HomeTeam': home, 'AwayTeam': away})
+        # Lo mismo que df.apply(parse_teams, axis=1): texto, u object con None si alguno no se reconoce
+        if equipos.isna().any(axis=None): equipos = equipos.astype(object).where(equipos.notna(), None)
+        else: equipos = equipos.astype(str)
+        df[['HomeTeam', 'AwayTeam']] = equipos
+    return df
+
+
+def verificar_paridad(df):
+    """
+    Compara calcular_features() contra el ciclo original sobre el mismo df base.
+    Lanza AssertionError si alguna columna difiere.
+    """
+    base = preparar_base(df.copy())
+    pd.testing.assert_frame_equal(calcular_features(base), calcular_features_loop(base))
+
+
+if __name__ == '__main__':
+    # Uso: python features.py [archivo.xlsx]
+    archivo = sys.argv[1] if len(sys.argv) > 1 else 'datos.xlsx'
+    verificar_paridad(pd.read_excel(archivo))
+    print(f"OK: paridad de features verificada en '{archivo}'")
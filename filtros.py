@@ -0,0 +1,145 @@
+# ==============================================================================
+# ÍNDICE DE FILTROS (BITMAPS)
+# ==============================================================================
+# Se construye una sola vez al cargar los datos: para cada (columna, valor) que
+# ofrece un selectbox del sidebar guarda un bitmap empaquetado (np.packbits) con
+# las filas que cumplen. Una consulta hace AND/OR de bitmaps y materializa una
+# única selección final de filas, en vez de encadenar ~20 máscaras sobre copias
+# del df.
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+MODO_MODELO = "🤖 Rendimiento del Modelo"
+MODO_EQUIPO = "🌍 Tendencias de Equipo (Mercado)"
+
+# Columnas que aparecen en crear_filtro (ambos modos) + equipos y clases
+COLUMNAS_FILTRO = [
+    'Selección Modelo', 'EsLocal', 'Confianza', 'H2H_Season',
+    'Tipo de Momio', 'Tipo de Partido', 'Nivel de Línea',
+    'HomeTeam', 'AwayTeam', 'Real_Home_Class', 'Real_Away_Class',
+    'Calc_Pick_Travel', 'Calc_Opp_Travel', 'Calc_Home_Travel', 'Calc_Away_Travel',
+    'Calc_Pick_Prev_ATS', 'Calc_Opp_Prev_ATS', 'Calc_Home_Prev_ATS', 'Calc_Away_Prev_ATS',
+    'Calc_Pick_Prev_ML', 'Calc_Opp_Prev_ML', 'Calc_Home_Prev_ML', 'Calc_Away_Prev_ML',
+    'Calc_Pick_Prev_OU', 'Calc_Opp_Prev_OU', 'Calc_Home_Prev_OU', 'Calc_Away_Prev_OU',
+    'Calc_Home_Rest', 'Calc_Away_Rest',
+    # Ventanas (features.calcular_ventanas)
+    'Calc_Home_ATS_Ult', 'Calc_Away_ATS_Ult', 'Calc_Home_ML_Ult', 'Calc_Away_ML_Ult',
+    'Calc_Home_ATS_Rol', 'Calc_Away_ATS_Rol',
+    'Calc_Home_Juegos_Dias', 'Calc_Away_Juegos_Dias', 'Calc_Home_B2B_Dias', 'Calc_Away_B2B_Dias',
+]
+COLUMNAS_RACHA = ['Calc_Home_Streak', 'Calc_Away_Streak']
+
+OPCIONES_RACHA = ["Todos", "3+ Victorias (🔥)", "4+ Victorias (🔥🔥)", "5+ Victorias (🔥🔥🔥)", "6+ Victorias (🚀)",
+                  "3+ Derrotas (❄️)", "4+ Derrotas (❄️❄️)", "5+ Derrotas (🧊)", "6+ Derrotas (💀)"]
+
+
+def mascara_racha(serie, label_filtro):
+    """Máscara booleana de un rango de racha ("3+ Victorias", "4+ Derrotas", ...)."""
+    try: num = int(label_filtro.split('+')[0])
+    except: return None
+    if "Victorias" in label_filtro: return (serie >= num).to_numpy()
+    elif "Derrotas" in label_filtro: return (serie <= -num).to_numpy()
+    return None
+
+
+def opciones_filtro(valores):
+    """Opciones del selectbox a partir de los valores distintos ya normalizados (fillna("N/A").astype(str))."""
+    return sorted(v for v in valores if v != "" and v != "nan")
+
+
+class IndiceFiltros:
+    """Bitmaps empaquetados por (columna, valor) sobre un df inmutable."""
+
+    def __init__(self, df, columnas=COLUMNAS_FILTRO, columnas_racha=COLUMNAS_RACHA):
+        self.n = len(df)
+        self._bits = {}
+        self._valores = {}
+        self._vacio = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        self._lleno = np.packbits(np.ones(self.n, dtype=bool))
+
+        for col in columnas:
+            if col not in df.columns: continue
+            # Misma normalización que muestra el selectbox
+            codigos, uniques = pd.factorize(df[col].fillna("N/A").astype(str))
+            for i, v in enumerate(uniques):
+                self._bits[(col, v)] = np.packbits(codigos == i)
+            self._valores[col] = opciones_filtro(uniques)
+
+        for col in columnas_racha:
+            if col not in df.columns: continue
+            for label in OPCIONES_RACHA[1:]:
+                m = mascara_racha(df[col], label)
+                if m is not None: self._bits[(col, label)] = np.packbits(m)
+
+    def tiene(self, columna):
+        return columna in self._valores
+
+    def valores(self, columna):
+        """Opciones del selectbox (sin 'Todos'), ya ordenadas."""
+        return self._valores.get(columna, [])
+
+    def bitmap(self, columna, valor):
+        """Bitmap empaquetado de columna == valor (vacío si el valor no existe)."""
+        return self._bits.get((columna, str(valor)), self._vacio)
+
+    def mascara(self, bitmaps):
+        """AND de todos los bitmaps -> máscara booleana por fila."""
+        acc = self._lleno.copy()
+        for b in bitmaps: np.bitwise_and(acc, b, out=acc)
+        return np.unpackbits(acc, count=self.n).astype(bool)
+
+    def seleccionar(self, bitmaps):
+        """AND de todos los bitmaps -> posiciones de fila (np.ndarray de int)."""
+        if not bitmaps: return np.arange(self.n)
+        return np.flatnonzero(self.mascara(bitmaps))
+
+
+# ==============================================================================
+# TABLA EQUIPO-PARTIDO
+# ==============================================================================
+ROLES = ["Todos", "Local (Home)", "Visita (Away)"]
+COLUMNAS_TABLA_CATEGORIA = ['rival', 'clase', 'rest', 'travel', 'prev_ats', 'prev_ml', 'prev_ou']
+
+
+def construir_tabla_equipos(df):
+    """
+    Una fila por equipo por partido, vista desde ese equipo: lado, rival,
+    clasificación, si cubrió / ganó, racha, descanso, viaje y previos.
+    Índice = equipo (ordenado), así un equipo es un solo slice; 'fila' es la
+    posición del partido en df.
+    """
+    n = len(df)
+    lados = {}
+    for lado, yo, rival in [('Home', 'HomeTeam', 'AwayTeam'), ('Away', 'AwayTeam', 'HomeTeam')]:
+        lados[lado] = pd.DataFrame({
+            'team': df[yo].to_numpy(dtype=object),
+            'fila': np.arange(n, dtype=np.int32),
+            'is_home': lado == 'Home',
+            'rival': df[rival].to_numpy(dtype=object),
+            'clase': df[f'Real_{lado}_Class'].fillna("N/A").astype(str).to_numpy(dtype=object),
+            'covered': df[f'Real_{lado}_Covered'].to_numpy(dtype=bool),
+            'won': df[f'Real_{lado}_Won'].to_numpy(dtype=bool),
+            'streak': df[f'Calc_{lado}_Streak'].to_numpy(),
+            'rest': df[f'Calc_{lado}_Rest'].to_numpy(dtype=object),
+            'travel': df[f'Calc_{lado}_Travel'].to_numpy(dtype=object),
+            'prev_ats': df[f'Calc_{lado}_Prev_ATS'].to_numpy(dtype=object),
+            'prev_ml': df[f'Calc_{lado}_Prev_ML'].to_numpy(dtype=object),
+            'prev_ou': df[f'Calc_{lado}_Prev_OU'].to_numpy(dtype=object),
+        })
+    tabla = pd.concat([lados['Home'], lados['Away']], ignore_index=True)
+    tabla = tabla[tabla['team'].notna()].astype({'team': str})
+    # Mismos dtypes compactos que el df (almacen.compactar): etiquetas como
+    # category y 'fila' en int32, para que la tabla no pese más que el df
+    tabla = tabla.astype({c: 'category' for c in COLUMNAS_TABLA_CATEGORIA})
+    return tabla.sort_values(['team', 'fila'], kind='mergesort').set_index('team')
+
+
+def partidos_equipo(tabla, equipo, rol='Todos', clase='Todos'):
+    """Slice de un equipo en la tabla equipo-partido, con rol y clasificación propios."""
+    i, j = tabla.index.searchsorted(equipo, 'left'), tabla.index.searchsorted(equipo, 'right')
+    te = tabla.iloc[i:j]
+    if rol == "Local (Home)": te = te[te['is_home'].to_numpy()]
+    elif rol == "Visita (Away)": te = te[~te['is_home'].to_numpy()]
+    if clase != 'Todos': te = te[(te['clase'] == clase).to_numpy()]
+    return te
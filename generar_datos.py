@@ -0,0 +1,155 @@
+# ==============================================================================
+# GENERADOR DE DATOS SINTÉTICOS
+# ==============================================================================
+# Escribe libros con el mismo formato que datos.xlsx (mismas columnas, mismas
+# etiquetas de Tipo de Momio / Confianza / Nivel de Línea, strings de Partido
+# válidos para parse_teams) al tamaño que se pida, para medir la app a 10× o
+# 100× la historia real. Calendario por temporada: cada equipo juega a lo más
+# un partido por día.
+#
+# Uso:
+#   python generar_datos.py --partidos 50000 --salida sintetico.xlsx [--semilla 7]
+# ==============================================================================
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Equipo -> (conferencia, división)
+EQUIPOS = {
+    'BOS': ('E', 'ATL'), 'BKN': ('E', 'ATL'), 'NYK': ('E', 'ATL'), 'PHI': ('E', 'ATL'), 'TOR': ('E', 'ATL'),
+    'CHI': ('E', 'CEN'), 'CLE': ('E', 'CEN'), 'DET': ('E', 'CEN'), 'IND': ('E', 'CEN'), 'MIL': ('E', 'CEN'),
+    'ATL': ('E', 'SE'), 'CHA': ('E', 'SE'), 'MIA': ('E', 'SE'), 'ORL': ('E', 'SE'), 'WAS': ('E', 'SE'),
+    'DEN': ('W', 'NW'), 'MIN': ('W', 'NW'), 'OKC': ('W', 'NW'), 'POR': ('W', 'NW'), 'UTA': ('W', 'NW'),
+    'GSW': ('W', 'PAC'), 'LAC': ('W', 'PAC'), 'LAL': ('W', 'PAC'), 'PHX': ('W', 'PAC'), 'SAC': ('W', 'PAC'),
+    'DAL': ('W', 'SW'), 'HOU': ('W', 'SW'), 'MEM': ('W', 'SW'), 'NOP': ('W', 'SW'), 'SAS': ('W', 'SW'),
+}
+PARTIDOS_POR_TEMPORADA = 1230
+PARTIDOS_POR_DIA = 7.2
+COLUMNAS_LEGADO = ['Pick_Travel_Status', 'Pick_Prev_ATS', 'Pick_Prev_Dog/Fav_Cover', 'Pick_Prev_O/U',
+                   'Opp_Travel_Status', 'Opp_Prev_ATS', 'Opp_Prev_Dog/Fav_Cover2', 'Opp_Prev_O/U2']
+
+
+def _clasificar(valores, cortes, etiquetas):
+    return np.asarray(etiquetas, dtype=object)[np.searchsorted(cortes, valores, side='right')]
+
+
+def tipo_momio(momio):
+    return _clasificar(momio, [-314, -172, -107, 147, 262], [
+        'Favorito Pesado (-315 o menos)', 'Favorito Moderado (-175 a -310)', 'Favorito Ligero (-110 a -170)',
+        'Underdog Ligero (-105 a +145)', 'Underdog Moderado (+150 a +260)', 'Underdog Pesado (+265 o más)'])
+
+
+def confianza(prob):
+    return _clasificar(prob, [0.635, 0.745, 0.785], ['Baja (<0.64)', 'Neutra (0.64-0.74)', 'Alta (0.75-0.78)', 'Peligro (>0.78)'])
+
+
+def nivel_linea(linea):
+    return _clasificar(linea, [221.25, 227.25, 231.25, 237.25], [
+        'Muy Baja (<=221)', 'Baja (221.5-227)', 'Media (227.5-231)', 'Alta (231.5-237)', 'Muy Alta (>=237.5)'])
+
+
+def _momio_desde_prob(p):
+    """Momio americano a partir de la probabilidad implícita."""
+    return np.where(p >= 0.5, -100 * p / (1 - p), 100 * (1 - p) / p)
+
+
+def _calendario(rng, n, inicio):
+    """Fechas, local y visita de n partidos; un partido por equipo por día."""
+    equipos = np.array(list(EQUIPOS))
+    fechas, locales, visitas = [], [], []
+    dia = pd.Timestamp(inicio)
+    while len(locales) < n:
+        k = min(int(rng.poisson(PARTIDOS_POR_DIA)) or 1, len(equipos) // 2, n - len(locales))
+        orden = rng.permutation(len(equipos))[:2 * k]
+        locales.extend(equipos[orden[:k]])
+        visitas.extend(equipos[orden[k:]])
+        fechas.extend([dia] * k)
+        dia += pd.Timedelta(days=1)
+    return np.array(fechas, dtype='datetime64[ns]'), np.array(locales), np.array(visitas)
+
+
+def generar(partidos=PARTIDOS_POR_TEMPORADA, semilla=7, inicio='2015-10-20'):
+    """DataFrame sintético con el formato de datos.xlsx."""
+    rng = np.random.default_rng(semilla)
+    temporadas = -(-partidos // PARTIDOS_POR_TEMPORADA)
+    partes = []
+    for t in range(temporadas):
+        n = min(PARTIDOS_POR_TEMPORADA, partidos - t * PARTIDOS_POR_TEMPORADA)
+        inicio_t = pd.Timestamp(inicio) + pd.DateOffset(years=t)
+        fecha, local, visita = _calendario(rng, n, inicio_t)
+        par = np.where(local < visita, np.char.add(np.char.add(local, '-'), visita), np.char.add(np.char.add(visita, '-'), local))
+        h2h = pd.Series(par).groupby(par).cumcount().to_numpy() + 1
+        partes.append(pd.DataFrame({'Fecha': fecha, 'local': local, 'visita': visita, 'H2H_Season': h2h}))
+    df = pd.concat(partes, ignore_index=True)
+    n = len(df)
+
+    # Mercado: probabilidad del local y momios de ambos lados (con vig)
+    p_local = np.clip(rng.beta(2.2, 2.0, n), 0.04, 0.96)
+    m_local = np.round(_momio_desde_prob(np.clip(p_local + 0.02, 0.05, 0.97)) / 5) * 5
+    m_visita = np.round(_momio_desde_prob(np.clip(1 - p_local + 0.02, 0.05, 0.97)) / 5) * 5
+    m_local, m_visita = m_local.astype(int), m_visita.astype(int)
+
+    pick_local = rng.random(n) < 0.63
+    pick = np.where(pick_local, df['local'], df['visita'])
+    momio_pick = np.where(pick_local, m_local, m_visita)
+    p_pick = np.where(pick_local, p_local, 1 - p_local)
+    prob = np.round(np.clip(0.5 + rng.beta(1.5, 3.0, n) * 0.49, 0.5, 0.99), 2)
+
+    conf_l = np.array([EQUIPOS[e][0] for e in df['local']])
+    conf_v = np.array([EQUIPOS[e][0] for e in df['visita']])
+    div_l = np.array([EQUIPOS[e][1] for e in df['local']])
+    div_v = np.array([EQUIPOS[e][1] for e in df['visita']])
+    tipo_partido = np.where(div_l == div_v, 'Intra división', np.where(conf_l == conf_v, 'Intraconferencia', 'Interconferencia'))
+
+    linea = np.round(rng.normal(231, 6.5, n) * 2) / 2
+    ot = rng.random(n) < 0.035
+    puntaje = np.round(linea + rng.normal(0, 17, n) + ot * 12).astype(int)
+
+    def fmt(m): return np.char.add(np.where(m > 0, '+', ''), m.astype(str))
+    partido = np.char.add(np.char.add(np.char.add(np.char.add(np.char.add(np.char.add(
+        df['local'].to_numpy().astype(str), ' ('), fmt(m_local)), ') vs '), df['visita'].to_numpy().astype(str)), ' ('), fmt(m_visita))
+    partido = np.char.add(partido, ')')
+
+    salida = pd.DataFrame({
+        'Fecha': df['Fecha'],
+        'Partido (Local vs Visitante)': partido,
+        'H2H_Season': df['H2H_Season'],
+        'Selección Modelo': pick,
+        'Prob.': prob,
+        'Confianza': confianza(prob),
+        'EsLocal': np.where(pick_local, 'SI', 'NO'),
+        'Momio_Seleccion': momio_pick,
+        'Tipo de Momio': tipo_momio(momio_pick),
+        'Tipo de Partido': tipo_partido,
+        'Situación B2B': rng.choice(['NO', 'vs B2B', 'SI', 'AMBOS'], n, p=[0.715, 0.12, 0.115, 0.05]),
+    })
+    for c in COLUMNAS_LEGADO: salida[c] = np.nan
+    salida['Resultado ATS'] = np.where(rng.random(n) < 0.5, 'SI', 'NO')
+    salida['Resultado ML'] = np.where(rng.random(n) < p_pick, 'SI', 'NO')
+    salida['Puntaje Total'] = puntaje
+    salida['Línea O/U'] = linea
+    salida['OT'] = np.where(ot, 'SI', 'NO')
+    salida['Resultado O/U'] = np.where(puntaje > linea, 'Over', 'Under')
+    salida['Nivel de Línea'] = nivel_linea(linea)
+    return salida
+
+
+def escribir(df, ruta):
+    if ruta.lower().endswith('.csv'): df.to_csv(ruta, index=False)
+    else: df.to_excel(ruta, index=False)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Genera libros sintéticos con el formato de datos.xlsx.")
+    ap.add_argument('--partidos', type=int, default=PARTIDOS_POR_TEMPORADA)
+    ap.add_argument('--semilla', type=int, default=7)
+    ap.add_argument('--salida', default='sintetico.xlsx')
+    args = ap.parse_args(argv)
+    df = generar(args.partidos, args.semilla)
+    escribir(df, args.salida)
+    print(f"{len(df)} partidos ({df['Fecha'].min():%Y-%m-%d} a {df['Fecha'].max():%Y-%m-%d}) -> {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# ==============================================================================
+# GRÁFICOS PRE-AGREGADOS
+# ==============================================================================
+# Todas las gráficas se agregan en pandas y Altair recibe solo las filas de
+# resumen (unas decenas), no el df filtrado completo: el spec de Vega-Lite que
+# viaja al navegador queda del mismo tamaño sin importar cuántos partidos haya.
+# ==============================================================================
+import altair as alt
+import pandas as pd
+
+from metricas import BREAK_EVEN
+
+ORDEN_REST = ["0", "1", "2", "3+", "N/A"]
+ORDEN_TRAVEL = ["L-L (Homestand)", "L-V (Sale)", "V-L (Regresa)", "V-V (Gira)", "N/A"]
+
+
+# ==============================================================================
+# AGREGACIONES
+# ==============================================================================
+def resumen_ats(ats_wins, total):
+    return pd.DataFrame({'R': ['Cubrió', 'Falló'], 'V': [ats_wins, total - ats_wins]})
+
+
+def resumen_ou(df_f):
+    conteo = df_f['Resultado O/U'].value_counts()
+    conteo = conteo[conteo > 0]  # category: value_counts incluye categorías sin partidos
+    return pd.DataFrame({'Resultado O/U': conteo.index.astype(str), 'Partidos': conteo.to_numpy()})
+
+
+def ats_por(claves, win_flag, nombre):
+    """Partidos y ATS % por cada valor de `claves` (arrays alineados con win_flag)."""
+    g = pd.DataFrame({nombre: pd.Series(claves).fillna("N/A").astype(str).to_numpy(),
+                      'win': pd.Series(win_flag).to_numpy(dtype=bool)})
+    g = g.groupby(nombre, sort=True)['win'].agg(Partidos='size', Cubiertos='sum').reset_index()
+    g['ATS %'] = g['Cubiertos'] / g['Partidos'] * 100
+    return g
+
+
+def ats_por_mes(df_f):
+    return ats_por(df_f['Fecha'].dt.strftime('%Y-%m').to_numpy(), df_f['WIN_FLAG'].to_numpy(), 'Mes')
+
+
+def resumenes(df_f):
+    """Resúmenes de la pestaña de gráficos: O/U y ATS por descanso, viaje y mes."""
+    return {
+        'ou': resumen_ou(df_f),
+        'rest': ats_por(df_f['PERS_REST'], df_f['WIN_FLAG'], 'Rest'),
+        'viaje': ats_por(df_f['PERS_TRAVEL'], df_f['WIN_FLAG'], 'Viaje'),
+        'mes': ats_por_mes(df_f),
+    }
+
+
+def sumar_resumenes(partes):
+    """resumenes de bloques de filas disjuntos (p. ej. los de MotorDisco.agregados) sumados en uno."""
+    ou = pd.concat([p['ou'] for p in partes], ignore_index=True).groupby('Resultado O/U', sort=False)['Partidos'].sum()
+    res = {'ou': ou.sort_values(ascending=False, kind='mergesort').reset_index()}
+    for k, nombre in (('rest', 'Rest'), ('viaje', 'Viaje'), ('mes', 'Mes')):
+        g = pd.concat([p[k] for p in partes], ignore_index=True)
+        g = g.groupby(nombre, sort=True)[['Partidos', 'Cubiertos']].sum().reset_index()
+        g['ATS %'] = g['Cubiertos'] / g['Partidos'] * 100
+        res[k] = g
+    return res
+
+
+# ==============================================================================
+# CHARTS
+# ==============================================================================
+def chart_ats(resumen):
+    return alt.Chart(resumen).mark_arc(innerRadius=60).encode(
+        theta=alt.Theta("V", stack=True), color=alt.Color("R", scale=alt.Scale(range=['#00c853', '#ff5252']))
+    )
+
+
+def chart_ou(resumen):
+    return alt.Chart(resumen).mark_bar().encode(
+        x="Partidos:Q", y=alt.Y("Resultado O/U:N", sort="-x"), color="Resultado O/U:N"
+    )
+
+
+def chart_ats_por(resumen, nombre, orden=None, titulo=None):
+    """Barras de ATS % por categoría con la línea de break-even."""
+    base = alt.Chart(resumen).encode(x=alt.X(f"{nombre}:N", sort=orden, title=titulo or nombre))
+    barras = base.mark_bar().encode(
+        y=alt.Y("ATS %:Q", scale=alt.Scale(domain=[0, 100])),
+        color=alt.condition(alt.datum['ATS %'] > BREAK_EVEN, alt.value('#00c853'), alt.value('#ff5252')),
+        tooltip=[nombre, 'Partidos', alt.Tooltip('ATS %:Q', format='.1f')],
+    )
+    etiquetas = base.mark_text(dy=-6, color='white').encode(y="ATS %:Q", text="Partidos:Q")
+    linea = alt.Chart(pd.DataFrame({'y': [BREAK_EVEN]})).mark_rule(strokeDash=[4, 4], color='#f1c40f').encode(y='y:Q')
+    return barras + etiquetas + linea
+
+
+def chart_curva(diario):
+    """Unidades acumuladas por fecha (backtest.por_dia) con la línea de cero."""
+    linea = alt.Chart(diario).mark_line(color='#3498db').encode(
+        x=alt.X('Fecha:T', title=None), y=alt.Y('unidades:Q', title='Unidades'),
+        tooltip=[alt.Tooltip('Fecha:T'), alt.Tooltip('unidades:Q', format='.2f'), alt.Tooltip('drawdown:Q', format='.2f')],
+    )
+    cero = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(strokeDash=[4, 4], color='#7f8c8d').encode(y='y:Q')
+    return linea + cero
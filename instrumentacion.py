@@ -0,0 +1,85 @@
+# ==============================================================================
+# INSTRUMENTACIÓN POR ETAPAS
+# ==============================================================================
+# Modo opcional para convertir "la app está lenta" en números por etapa: cada
+# bloque de Analisis.py se envuelve en `inst.etapa(...)`, que anota segundos,
+# memoria residente (RSS) al terminar y su variación, y las filas que salen de
+# la etapa. Al final de la corrida se muestra en el sidebar y se agrega una
+# línea por etapa a un log JSON-lines local para agregarlo después:
+#
+#   pd.read_json('.cache_v14/instrumentacion.jsonl', lines=True) \
+#     .groupby('etapa')['seg'].describe(percentiles=[.5, .95])
+#
+# Desactivada, `etapa` no mide nada (costo ~0).
+# ==============================================================================
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from almacen import CARPETA_CACHE
+
+LOG_INSTRUMENTACION = os.path.join(CARPETA_CACHE, 'instrumentacion.jsonl')
+
+
+def memoria_rss_mb():
+    """RSS actual del proceso en MB (psutil si está instalado, /proc en Linux); None si no se puede leer."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f: return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Instrumentacion:
+    """Registros de una corrida del script (una fila por etapa)."""
+
+    def __init__(self, activa=False, contexto=None):
+        self.activa = activa
+        self.contexto = contexto or {}
+        self.corrida = uuid.uuid4().hex[:12]
+        self.registros = []
+
+    @contextmanager
+    def etapa(self, nombre):
+        """
+        Mide el bloque. El bloque puede anotar las filas que produce:
+            with inst.etapa('filtros') as e: df_f = ...; e['filas'] = len(df_f)
+        """
+        registro = {'etapa': nombre, 'filas': None}
+        if not self.activa:
+            yield registro
+            return
+        rss_antes = memoria_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['seg'] = time.perf_counter() - t0
+            registro['rss_mb'] = rss = memoria_rss_mb()
+            registro['delta_rss_mb'] = None if rss is None or rss_antes is None else rss - rss_antes
+            self.registros.append(registro)
+
+    def tabla(self):
+        """Registros como lista de dicts para st.dataframe (ms, MB)."""
+        def redondear(v, f=1): return None if v is None else round(v * f, 1)
+        return [{'Etapa': r['etapa'], 'ms': redondear(r['seg'], 1000), 'RSS MB': redondear(r['rss_mb']),
+                 'Δ RSS MB': redondear(r['delta_rss_mb']), 'Filas': r['filas']} for r in self.registros]
+
+    def guardar(self, ruta=LOG_INSTRUMENTACION):
+        """Agrega una línea JSON por etapa al log (no falla la app si no se puede escribir)."""
+        if not self.registros: return
+        ts = time.strftime('%Y-%m-%dT%H:%M:%S')
+        try:
+            os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+            with open(ruta, 'a', encoding='utf-8') as f:
+                for r in self.registros:
+                    f.write(json.dumps({'ts': ts, 'corrida': self.corrida, 'pid': os.getpid(), **self.contexto, **r},
+                                       ensure_ascii=False) + '\n')
+        except OSError:
+            pass
@@ -0,0 +1,28 @@
+# ==============================================================================
+# MÉTRICAS DEL DASHBOARD
+# ==============================================================================
+# Fórmulas de la sección 6 (ATS %, ML %, ROI, Over %) en un solo lugar, para
+# que el dashboard, el escáner y los scripts usen exactamente el mismo cálculo.
+# Aceptan escalares o arrays (numpy / pandas) indistintamente.
+# ==============================================================================
+import numpy as np
+
+PAGO_ATS = 90.91      # Ganancia por 100 apostados a -110
+APUESTA = 100
+BREAK_EVEN = 52.4     # % ATS necesario para no perder a -110
+
+
+def roi_ats(partidos, ats_wins):
+    return (ats_wins * PAGO_ATS - (partidos - ats_wins) * APUESTA) / (partidos * APUESTA) * 100
+
+
+def resumen(partidos, ats_wins, ml_wins, overs):
+    """Dict con partidos, ats_pct, ml_pct, roi y over_pct."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'partidos': partidos,
+            'ats_pct': ats_wins / partidos * 100,
+            'ml_pct': ml_wins / partidos * 100,
+            'roi': roi_ats(partidos, ats_wins),
+            'over_pct': overs / partidos * 100,
+        }
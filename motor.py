@@ -0,0 +1,250 @@
+# ==============================================================================
+# MOTOR DE CONSULTAS (SIN STREAMLIT)
+# ==============================================================================
+# Carga, filtrado (sección 5) y métricas (sección 6) del dashboard como funciones
+# importables, para usarlas desde cron, notebooks o la línea de comandos sin
+# levantar un servidor de Streamlit.
+#
+#   from motor import Motor
+#   m = Motor.desde_archivo('datos.xlsx')
+#   m.metricas({'modo': 'equipo', 'target_team': 'BOS', 'role': 'Local (Home)'})
+#
+# CLI:
+#   python motor.py --spec '{"modo": "modelo", "confianza": "Alta (0.75-0.78)"}'
+#   python motor.py --set modo=equipo --set target_team=BOS --json
+#   python motor.py --spec-file consultas.json   # lista de specs -> una línea cada una
+#   python motor.py --particiones --set modo=modelo   # backend fuera de memoria (particiones.py)
+# ==============================================================================
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from almacen import CARPETA_CACHE, cargar_dataset
+from filtros import MODO_MODELO, MODO_EQUIPO, IndiceFiltros, construir_tabla_equipos, partidos_equipo
+from metricas import resumen
+
+ARCHIVO = 'datos.xlsx'
+
+# Claves del spec = variables f_* del sidebar (sin prefijo). En modo equipo,
+# *_pick / *_opp se refieren al Local / Visita, igual que en la app.
+SPEC_DEFAULT = {
+    'modo': MODO_EQUIPO,
+    # Modelo
+    'equipo': 'Todos', 'condicion': 'Todos', 'confianza': 'Todos', 'ml': 'Todos',
+    # Equipo
+    'target_team': 'Todos', 'role': 'Todos', 'status_team_class': 'Todos',
+    # Situacional
+    'travel_pick': 'Todos', 'travel_opp': 'Todos',
+    'prev_pick_ats': 'Todos', 'prev_opp_ats': 'Todos',
+    'prev_pick_ml': 'Todos', 'prev_opp_ml': 'Todos',
+    'prev_pick_ou': 'Todos', 'prev_opp_ou': 'Todos',
+    # Comunes
+    'h2h': 'Todos', 'streak_h': 'Todos', 'streak_a': 'Todos',
+    'rest_h': 'Todos', 'rest_a': 'Todos', 'tipo': 'Todos', 'linea': 'Todos',
+    # Ventanas (últimos N partidos / D días, Local y Visita)
+    'ats_ult_h': 'Todos', 'ats_ult_a': 'Todos', 'ml_ult_h': 'Todos', 'ml_ult_a': 'Todos',
+    'ats_rol_h': 'Todos', 'ats_rol_a': 'Todos',
+    'juegos_dias_h': 'Todos', 'juegos_dias_a': 'Todos', 'b2b_dias_h': 'Todos', 'b2b_dias_a': 'Todos',
+}
+
+# Columnas que agrega Motor.filtrar (no vienen del Excel)
+COLUMNAS_MOTOR = ['WIN_FLAG', 'ML_FLAG', 'PERS_REST', 'PERS_TRAVEL']
+
+ALIAS_MODO = {'modelo': MODO_MODELO, 'equipo': MODO_EQUIPO}
+
+
+def normalizar_spec(spec):
+    """Completa un spec parcial con 'Todos' y valida las claves."""
+    desconocidas = set(spec) - set(SPEC_DEFAULT)
+    if desconocidas: raise ValueError(f"Claves de filtro desconocidas: {sorted(desconocidas)}")
+    s = {**SPEC_DEFAULT, **{k: str(v) for k, v in spec.items()}}
+    s['modo'] = ALIAS_MODO.get(s['modo'], s['modo'])
+    if s['modo'] not in (MODO_MODELO, MODO_EQUIPO): raise ValueError(f"Modo desconocido: {s['modo']}")
+    # El momio del pick solo existe en modo modelo (en la app el combo no aparece)
+    if s['modo'] == MODO_EQUIPO: s['ml'] = 'Todos'
+    return s
+
+
+def condiciones(s):
+    """
+    Pares (columna, valor) de todos los filtros a nivel partido de un spec
+    normalizado (sección 5). Los valores son las etiquetas del selectbox
+    (rachas: "3+ Victorias (🔥)", ...).
+    """
+    pares = []
+    def filtrar(columna, valor):
+        if valor != 'Todos': pares.append((columna, valor))
+
+    filtrar('H2H_Season', s['h2h'])
+
+    if s['modo'] == MODO_MODELO:
+        filtrar('Selección Modelo', s['equipo'])
+        filtrar('EsLocal', s['condicion'])
+        filtrar('Confianza', s['confianza'])
+
+        # Situacional (Pick/Opp)
+        filtrar('Calc_Pick_Travel', s['travel_pick'])
+        filtrar('Calc_Opp_Travel', s['travel_opp'])
+        filtrar('Calc_Pick_Prev_ATS', s['prev_pick_ats'])
+        filtrar('Calc_Opp_Prev_ATS', s['prev_opp_ats'])
+        filtrar('Calc_Pick_Prev_ML', s['prev_pick_ml'])
+        filtrar('Calc_Opp_Prev_ML', s['prev_opp_ml'])
+        filtrar('Calc_Pick_Prev_OU', s['prev_pick_ou'])
+        filtrar('Calc_Opp_Prev_OU', s['prev_opp_ou'])
+
+    else:
+        # 1. Filtro Equipo + 2. Rol y Clasificación Específica
+        # Con equipo objetivo se resuelve en la tabla equipo-partido (Motor.filtrar)
+        if s['target_team'] == 'Todos':
+            if s['role'] == "Local (Home)": filtrar('Real_Home_Class', s['status_team_class']) # Filtra por "Favorito Pesado", etc.
+            elif s['role'] == "Visita (Away)": filtrar('Real_Away_Class', s['status_team_class'])
+
+        # Situacional (Home/Away)
+        filtrar('Calc_Home_Travel', s['travel_pick'])
+        filtrar('Calc_Away_Travel', s['travel_opp'])
+        filtrar('Calc_Home_Prev_ATS', s['prev_pick_ats'])
+        filtrar('Calc_Away_Prev_ATS', s['prev_opp_ats'])
+        filtrar('Calc_Home_Prev_ML', s['prev_pick_ml'])
+        filtrar('Calc_Away_Prev_ML', s['prev_opp_ml'])
+
+    # Comunes
+    filtrar('Calc_Home_Streak', s['streak_h'])
+    filtrar('Calc_Away_Streak', s['streak_a'])
+    filtrar('Calc_Home_Rest', s['rest_h'])
+    filtrar('Calc_Away_Rest', s['rest_a'])
+    filtrar('Tipo de Partido', s['tipo'])
+    filtrar('Nivel de Línea', s['linea'])
+    filtrar('Tipo de Momio', s['ml'])
+
+    # Ventanas
+    filtrar('Calc_Home_ATS_Ult', s['ats_ult_h'])
+    filtrar('Calc_Away_ATS_Ult', s['ats_ult_a'])
+    filtrar('Calc_Home_ML_Ult', s['ml_ult_h'])
+    filtrar('Calc_Away_ML_Ult', s['ml_ult_a'])
+    filtrar('Calc_Home_ATS_Rol', s['ats_rol_h'])
+    filtrar('Calc_Away_ATS_Rol', s['ats_rol_a'])
+    filtrar('Calc_Home_Juegos_Dias', s['juegos_dias_h'])
+    filtrar('Calc_Away_Juegos_Dias', s['juegos_dias_a'])
+    filtrar('Calc_Home_B2B_Dias', s['b2b_dias_h'])
+    filtrar('Calc_Away_B2B_Dias', s['b2b_dias_a'])
+    return pares
+
+
+class Motor:
+    """df procesado + estructuras de consulta (índice de filtros, tabla equipo-partido)."""
+
+    def __init__(self, df):
+        self.df = df
+        self.indice = IndiceFiltros(df)
+        self.tabla_eq = construir_tabla_equipos(df)
+
+    @classmethod
+    def desde_archivo(cls, ruta=ARCHIVO, carpeta=CARPETA_CACHE, incremental=True):
+        return cls(cargar_dataset(ruta, carpeta, incremental))
+
+    def _bitmaps(self, s):
+        """Bitmaps de todos los filtros a nivel partido del spec (sección 5)."""
+        return [self.indice.bitmap(columna, valor) for columna, valor in condiciones(s)]
+
+    def filtrar(self, spec):
+        """
+        df filtrado (sección 5) con WIN_FLAG / ML_FLAG desde la perspectiva del
+        modo, y PERS_REST / PERS_TRAVEL del pick, del equipo objetivo o del local.
+        """
+        s = normalizar_spec(spec)
+        bitmaps = self._bitmaps(s)
+        df = self.df
+
+        if s['modo'] == MODO_EQUIPO and s['target_team'] != 'Todos':
+            # Flags Ganador desde la perspectiva del equipo objetivo (tabla equipo-partido)
+            te = partidos_equipo(self.tabla_eq, s['target_team'], s['role'], s['status_team_class'])
+            if bitmaps: te = te[self.indice.mascara(bitmaps)[te['fila'].to_numpy()]]
+            return df.iloc[te['fila'].to_numpy()].assign(
+                WIN_FLAG=te['covered'].to_numpy(), ML_FLAG=te['won'].to_numpy(),
+                PERS_REST=te['rest'].to_numpy(), PERS_TRAVEL=te['travel'].to_numpy(),
+            )
+
+        return agregar_flags(df.iloc[self.indice.seleccionar(bitmaps)], s['modo'])
+
+    def metricas(self, spec):
+        return metricas(self.filtrar(spec))
+
+
+def agregar_flags(df_f, modo):
+    """WIN_FLAG / ML_FLAG / PERS_REST / PERS_TRAVEL del pick (modo modelo) o del local (modo equipo)."""
+    if modo == MODO_EQUIPO:
+        return df_f.assign(
+            WIN_FLAG=df_f['Real_Home_Covered'], ML_FLAG=df_f['Real_Home_Won'], # Default Home
+            PERS_REST=df_f['Calc_Home_Rest'], PERS_TRAVEL=df_f['Calc_Home_Travel'],
+        )
+
+    pick_local = (df_f['Selección Modelo'] == df_f['HomeTeam']).to_numpy()
+    return df_f.assign(
+        WIN_FLAG=df_f['Resultado ATS'] == 'SI', ML_FLAG=df_f['Resultado ML'] == 'SI',
+        PERS_REST=np.where(pick_local, df_f['Calc_Home_Rest'].to_numpy(), df_f['Calc_Away_Rest'].to_numpy()),
+        PERS_TRAVEL=df_f['Calc_Pick_Travel'],
+    )
+
+
+def metricas(df_f):
+    """Partidos, ATS %, ML %, ROI y Over % de un df filtrado (sección 6)."""
+    return metricas_conteos(len(df_f), df_f['WIN_FLAG'].sum(), df_f['ML_FLAG'].sum(), (df_f['Resultado O/U'] == 'Over').sum())
+
+
+def metricas_conteos(partidos, ats_wins, ml_wins, overs):
+    """Lo mismo que metricas a partir de los conteos (p. ej. acumulados por bloques)."""
+    m = resumen(np.float64(partidos), ats_wins, ml_wins, overs)
+    return {k: (int(v) if k == 'partidos' else float(v)) for k, v in m.items()}
+
+
+def _formatear(spec, m):
+    if m['partidos'] == 0: return "Partidos: 0 | ⚠️ No hay datos."
+    ou = "OVER" if m['over_pct'] > 50 else "UNDER"
+    return (f"Partidos: {m['partidos']} | ATS: {m['ats_pct']:.1f}% | ML: {m['ml_pct']:.1f}% | "
+            f"ROI: {m['roi']:.1f}% | O/U: {ou} {max(m['over_pct'], 100 - m['over_pct']):.1f}%")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Consultas del NBA Analyzer sin Streamlit.")
+    ap.add_argument('--archivo', default=ARCHIVO, help="Archivo, carpeta o glob de libros / CSV")
+    ap.add_argument('--spec', help="Spec JSON (objeto o lista de objetos)")
+    ap.add_argument('--spec-file', help="Archivo con el spec JSON (objeto o lista)")
+    ap.add_argument('--set', action='append', default=[], metavar='CLAVE=VALOR', help="Filtro individual (repetible)")
+    ap.add_argument('--json', action='store_true', help="Salida en JSON lines")
+    ap.add_argument('--particiones', nargs='?', const='', metavar='CARPETA',
+                    help="Consulta el Parquet particionado por temporada (particiones.py) sin cargar el df")
+    args = ap.parse_args(argv)
+
+    if args.spec_file:
+        with open(args.spec_file, encoding='utf-8') as f: specs = json.load(f)
+    elif args.spec:
+        specs = json.loads(args.spec)
+    else:
+        specs = {}
+    specs = specs if isinstance(specs, list) else [specs]
+    extra = dict(kv.split('=', 1) for kv in args.set)
+    specs = [{**s, **extra} for s in specs]
+
+    try:
+        for spec in specs: normalizar_spec(spec)
+    except ValueError as e:
+        ap.error(str(e))
+
+    if args.particiones is not None:
+        from particiones import CARPETA_PARTICIONES, MotorDisco
+        motor = MotorDisco.desde_archivo(args.archivo, args.particiones or CARPETA_PARTICIONES)
+    else:
+        motor = Motor.desde_archivo(args.archivo)
+    for spec in specs:
+        m = motor.metricas(spec)
+        if args.json:
+            m = {k: (None if v != v else v) for k, v in m.items()}  # NaN -> null
+            print(json.dumps({'spec': spec, **m}, ensure_ascii=False))
+        else:
+            print(_formatear(spec, m))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+# ==============================================================================
+# BACKEND FUERA DE MEMORIA (PARQUET PARTICIONADO POR TEMPORADA)
+# ==============================================================================
+# Alternativa opcional a Motor para historias que no caben en RAM (varias
+# ligas / casas): el df procesado se exporta una vez a un dataset Parquet con
+# una carpeta por temporada (Temporada=2025/...), en orden de archivo y con
+# row groups acotados. Las consultas no cargan el df:
+#
+# - Los filtros de la sección 5 (motor.condiciones) se traducen a una
+#   expresión de pyarrow.dataset que se empuja al lector: solo se leen las
+#   columnas pedidas y se saltan los row groups / temporadas que las
+#   estadísticas descartan. Los archivos se abren con memory-map.
+# - Las métricas de la sección 6 (MotorDisco.metricas) leen 3-6 columnas por
+#   bloques de BLOQUE_FILAS y acumulan conteos; MotorDisco.agregados suma
+#   igual los resúmenes de los gráficos. La memoria queda acotada por el
+#   bloque, no por la historia.
+# - La tabla ordena solo posiciones + la columna clave (MotorDisco.claves) y
+#   lee una página a la vez (MotorDisco.filas); el backtest pide a filtrar
+#   solo COLUMNAS_BACKTEST.
+#
+# MotorDisco.filtrar devuelve lo mismo que Motor.filtrar (mismas filas, orden,
+# índice y flags); MotorDisco.indice da las opciones del sidebar sin leer
+# datos (se guardan al exportar).
+#
+# Cada versión del dataset se exporta a su propia subcarpeta
+# (carpeta/<version_dataset>/) y _actual.json apunta a la vigente: un
+# MotorDisco abierto sigue leyendo su versión aunque se exporte otra. Las
+# versiones viejas se borran aparte (limpiar_versiones), después de que
+# quien las usa se cambió a la nueva (ver Recargador.al_cambiar).
+#
+# La exportación corre aquí (CLI) y no en la app: la app solo abre la versión
+# vigente y cambia de versión cuando se mueve el puntero (huella_version).
+#
+# Uso:
+#   python particiones.py [--archivo datos/] [--carpeta .cache_v14/particiones]
+#   NBA_PARTICIONES=.cache_v14/particiones streamlit run Analisis.py
+# ==============================================================================
+import argparse
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from almacen import CARPETA_CACHE, compactar, cargar_dataset, hash_fuentes, listar_fuentes
+from features import VERSION_FEATURES
+from filtros import COLUMNAS_FILTRO, COLUMNAS_RACHA, MODO_MODELO, MODO_EQUIPO, opciones_filtro
+from graficos import resumenes, sumar_resumenes
+from motor import ARCHIVO, agregar_flags, condiciones, metricas_conteos, normalizar_spec
+
+CARPETA_PARTICIONES = os.path.join(CARPETA_CACHE, 'particiones')
+ARCHIVO_META = '_meta.json'
+ARCHIVO_ACTUAL = '_actual.json'   # Puntero a la subcarpeta de la versión vigente
+COLUMNA_TEMPORADA = 'Temporada'
+COLUMNA_FILA = '_fila'        # Posición en el df original (orden e índice de Motor.filtrar)
+FILAS_ROW_GROUP = 65_536
+BLOQUE_FILAS = 131_072
+# Lo que usa el backtest de la sección 6 además de los flags
+COLUMNAS_BACKTEST = ['Fecha', 'Momio_Seleccion']
+
+# Flags del equipo objetivo: columna por lado ({} = Home / Away) y dtype
+FLAGS_EQUIPO = {'WIN_FLAG': ('Real_{}_Covered', bool), 'ML_FLAG': ('Real_{}_Won', bool),
+                'PERS_REST': ('Calc_{}_Rest', object), 'PERS_TRAVEL': ('Calc_{}_Travel', object)}
+
+
+def temporada(fechas):
+    """Año de inicio de la temporada NBA (octubre-junio): 2025 = 2025-26."""
+    fechas = pd.DatetimeIndex(fechas)
+    return (fechas.year - (fechas.month < 8)).astype('int16')
+
+
+# ==============================================================================
+# EXPORTACIÓN
+# ==============================================================================
+def exportar(df, carpeta=CARPETA_PARTICIONES):
+    """
+    Escribe el df procesado como Parquet particionado por temporada más un
+    _meta.json (versión del dataset, columnas y opciones de los filtros) en
+    una subcarpeta nueva de `carpeta` y luego mueve el puntero _actual.json:
+    las versiones anteriores no se tocan. Devuelve la subcarpeta.
+    """
+    tabla = pa.Table.from_pandas(
+        df.assign(**{COLUMNA_FILA: np.arange(len(df)), COLUMNA_TEMPORADA: temporada(df['Fecha'])}),
+        preserve_index=False)
+    nombre = re.sub(r'[^\w.-]+', '_', str(df.attrs.get('version_dataset')))
+    destino, n = os.path.join(carpeta, nombre), 1
+    # Misma versión reexportada (--forzar): otra subcarpeta, la abierta sigue intacta
+    while os.path.exists(destino): n += 1; destino = os.path.join(carpeta, f"{nombre}.{n}")
+    tmp = destino + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    ds.write_dataset(tabla, tmp, format='parquet', partitioning=[COLUMNA_TEMPORADA], partitioning_flavor='hive',
+                     max_rows_per_group=FILAS_ROW_GROUP)
+    meta = {
+        'version_dataset': df.attrs.get('version_dataset'),
+        'filas': len(df),
+        'columnas': list(df.columns),
+        'valores': {c: opciones_filtro(df[c].fillna("N/A").astype(str).unique())
+                    for c in COLUMNAS_FILTRO if c in df.columns},
+    }
+    with open(os.path.join(tmp, ARCHIVO_META), 'w', encoding='utf-8') as f: json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, destino)
+    puntero = os.path.join(carpeta, ARCHIVO_ACTUAL)
+    with open(puntero + '.tmp', 'w', encoding='utf-8') as f: json.dump({'version': os.path.basename(destino)}, f)
+    os.replace(puntero + '.tmp', puntero)
+    return destino
+
+
+def carpeta_actual(carpeta=CARPETA_PARTICIONES):
+    """Subcarpeta de la versión vigente de `carpeta` (según _actual.json); `carpeta` si ya es una versión."""
+    try:
+        with open(os.path.join(carpeta, ARCHIVO_ACTUAL), encoding='utf-8') as f: return os.path.join(carpeta, json.load(f)['version'])
+    except (OSError, ValueError, KeyError):
+        return carpeta
+
+
+def huella_version(carpeta=CARPETA_PARTICIONES):
+    """Subcarpeta vigente de `carpeta`: cambia cuando se exporta otra versión (huella para Recargador)."""
+    return carpeta_actual(carpeta)
+
+
+def leer_meta(carpeta=CARPETA_PARTICIONES):
+    try:
+        with open(os.path.join(carpeta_actual(carpeta), ARCHIVO_META), encoding='utf-8') as f: return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def limpiar_versiones(carpeta=CARPETA_PARTICIONES, conservar=()):
+    """
+    Borra las subcarpetas de versiones de `carpeta` salvo la vigente y las de
+    `conservar` (las que algún MotorDisco todavía puede estar leyendo).
+    Llamar solo después de cambiar a la versión nueva.
+    """
+    if not os.path.isdir(carpeta): return
+    vivas = {os.path.abspath(c) for c in list(conservar) + [carpeta_actual(carpeta)]}
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        # Las .tmp son exportaciones en curso
+        if os.path.isdir(ruta) and not nombre.endswith('.tmp') and os.path.abspath(ruta) not in vivas:
+            shutil.rmtree(ruta, ignore_errors=True)
+
+
+def asegurar_particiones(ruta=ARCHIVO, carpeta=CARPETA_PARTICIONES, incremental=True):
+    """
+    Exporta `ruta` a `carpeta` si falta o si sus fuentes / versión de features
+    cambiaron (solo hashea los archivos; no carga el df si está al día).
+    Devuelve la subcarpeta de la versión vigente.
+    """
+    rutas = listar_fuentes(ruta)
+    if not rutas: raise FileNotFoundError(f"Sin archivos de datos en '{ruta}'")
+    meta = leer_meta(carpeta)
+    if meta is None or meta['version_dataset'] != f"{hash_fuentes(rutas)}:{VERSION_FEATURES}":
+        return exportar(cargar_dataset(ruta, incremental=incremental), carpeta)
+    return carpeta_actual(carpeta)
+
+
+# ==============================================================================
+# CONSULTAS
+# ==============================================================================
+class IndiceParticiones:
+    """Misma interfaz de opciones que IndiceFiltros (tiene / valores), desde _meta.json."""
+
+    def __init__(self, valores):
+        self._valores = valores
+
+    def tiene(self, columna):
+        return columna in self._valores
+
+    def valores(self, columna):
+        return self._valores.get(columna, [])
+
+
+class MotorDisco:
+    """Consultas de la sección 5 / 6 empujadas al dataset particionado (sin df en memoria)."""
+
+    def __init__(self, carpeta=CARPETA_PARTICIONES):
+        # Queda fijo en la versión vigente al abrir, aunque después se exporte otra
+        self.carpeta = carpeta_actual(carpeta)
+        self.meta = leer_meta(self.carpeta)
+        if self.meta is None: raise FileNotFoundError(f"Sin particiones en '{carpeta}' (corre particiones.py)")
+        self.dataset = ds.dataset(self.carpeta, format='parquet', partitioning='hive',
+                                  filesystem=pafs.LocalFileSystem(use_mmap=True))
+        self.columnas = self.meta['columnas']
+        self.indice = IndiceParticiones(self.meta['valores'])
+
+    @classmethod
+    def desde_archivo(cls, ruta=ARCHIVO, carpeta=CARPETA_PARTICIONES, incremental=True):
+        return cls(asegurar_particiones(ruta, carpeta, incremental))
+
+    def _condicion(self, columna, valor):
+        """Expresión equivalente al bitmap (columna, valor) de IndiceFiltros."""
+        if columna not in self.dataset.schema.names: return ds.scalar(False)
+        campo = ds.field(columna)
+        if columna in COLUMNAS_RACHA:
+            try: num = int(valor.split('+')[0])
+            except ValueError: return ds.scalar(False)
+            if "Victorias" in valor: return campo >= num
+            if "Derrotas" in valor: return campo <= -num
+            return ds.scalar(False)
+        tipo = self.dataset.schema.field(columna).type
+        if pa.types.is_dictionary(tipo): tipo = tipo.value_type
+        # Misma normalización que el selectbox: fillna("N/A").astype(str)
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            return (campo == valor) | campo.is_null() if valor == "N/A" else campo == valor
+        if valor == "N/A": return campo.is_null()
+        for es, conv in ((pa.types.is_integer, int), (pa.types.is_floating, float), (pa.types.is_boolean, lambda v: v == 'True')):
+            if es(tipo):
+                try: v = conv(valor)
+                except ValueError: return ds.scalar(False)
+                return campo == v if str(v) == valor else ds.scalar(False)
+        return campo.cast(pa.string()) == valor
+
+    def _filtro(self, s, temporadas=None):
+        """Expresión de todo el spec: condiciones a nivel partido + equipo objetivo + temporadas."""
+        expr = ds.scalar(True)
+        for columna, valor in condiciones(s): expr = expr & self._condicion(columna, valor)
+        if s['modo'] == MODO_EQUIPO and s['target_team'] != 'Todos':
+            # Lo que hace partidos_equipo sobre la tabla equipo-partido, por lado
+            lados = []
+            for rol, lado, equipo in (("Local (Home)", 'Home', 'HomeTeam'), ("Visita (Away)", 'Away', 'AwayTeam')):
+                if s['role'] not in ('Todos', rol): continue
+                e = ds.field(equipo) == s['target_team']
+                if s['status_team_class'] != 'Todos': e = e & self._condicion(f'Real_{lado}_Class', s['status_team_class'])
+                lados.append(e)
+            expr = expr & (lados[0] | lados[1] if len(lados) == 2 else lados[0])
+        if temporadas is not None: expr = expr & ds.field(COLUMNA_TEMPORADA).isin([int(t) for t in temporadas])
+        return expr
+
+    def filtrar(self, spec, columnas=None, temporadas=None):
+        """
+        Como Motor.filtrar: filas del spec (orden e índice del df original) con
+        WIN_FLAG / ML_FLAG / PERS_REST / PERS_TRAVEL. `columnas` limita lo que
+        se lee; `temporadas` (años de inicio) poda particiones.
+        """
+        s = normalizar_spec(spec)
+        columnas = self.columnas if columnas is None else list(columnas)
+        leer = list(dict.fromkeys(columnas + self._columnas_flags(s) + [COLUMNA_FILA]))
+
+        df = self.dataset.to_table(columns=leer, filter=self._filtro(s, temporadas)).to_pandas()
+        df = compactar(df.sort_values(COLUMNA_FILA, kind='mergesort').set_index(COLUMNA_FILA).rename_axis(None))
+        df = self._con_flags(df, s)
+        return df[[c for c in columnas if c in df.columns] + ['WIN_FLAG', 'ML_FLAG', 'PERS_REST', 'PERS_TRAVEL']]
+
+    def _columnas_flags(self, s):
+        """Columnas que _con_flags necesita para el spec normalizado `s`."""
+        if s['modo'] == MODO_EQUIPO and s['target_team'] != 'Todos':
+            extra = [p.format(lado) for p, _ in FLAGS_EQUIPO.values() for lado in ('Home', 'Away')] + ['HomeTeam']
+        elif s['modo'] == MODO_EQUIPO: extra = ['Real_Home_Covered', 'Real_Home_Won', 'Calc_Home_Rest', 'Calc_Home_Travel']
+        else: extra = ['Resultado ATS', 'Resultado ML', 'Selección Modelo', 'HomeTeam',
+                       'Calc_Home_Rest', 'Calc_Away_Rest', 'Calc_Pick_Travel']
+        return [c for c in extra if c in self.columnas]
+
+    def _con_flags(self, df, s):
+        """WIN_FLAG / ML_FLAG / PERS_REST / PERS_TRAVEL como en Motor.filtrar."""
+        if s['modo'] == MODO_EQUIPO and s['target_team'] != 'Todos':
+            # Flags desde la perspectiva del equipo objetivo, según el lado en que jugó
+            local = (df['HomeTeam'] == s['target_team']).to_numpy()
+            return df.assign(**{flag: np.where(local, df[col.format('Home')].to_numpy(dtype=dtype), df[col.format('Away')].to_numpy(dtype=dtype))
+                                for flag, (col, dtype) in FLAGS_EQUIPO.items()})
+        return agregar_flags(df, s['modo'])
+
+    def claves(self, spec, columnas=(), temporadas=None):
+        """
+        Solo las posiciones de las filas del spec (índice, como filtrar) y
+        `columnas`: lo que la tabla necesita para ordenar y paginar.
+        """
+        s = normalizar_spec(spec)
+        leer = list(dict.fromkeys([c for c in columnas if c in self.columnas] + [COLUMNA_FILA]))
+        df = self.dataset.to_table(columns=leer, filter=self._filtro(s, temporadas)).to_pandas()
+        return compactar(df.sort_values(COLUMNA_FILA, kind='mergesort').set_index(COLUMNA_FILA).rename_axis(None))
+
+    def filas(self, posiciones, columnas=None):
+        """
+        Filas por posición en el df original (el índice de filtrar), en el orden
+        dado: una página de la tabla o la exportación. Los archivos están en
+        orden de _fila, así las estadísticas descartan los row groups ajenos.
+        """
+        columnas = self.columnas if columnas is None else list(columnas)
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        if not len(posiciones):
+            return self.dataset.to_table(columns=columnas, filter=ds.scalar(False)).to_pandas()
+        filtro = ((ds.field(COLUMNA_FILA) >= int(posiciones.min())) & (ds.field(COLUMNA_FILA) <= int(posiciones.max()))
+                  & ds.field(COLUMNA_FILA).isin(pa.array(posiciones)))
+        df = self.dataset.to_table(columns=list(dict.fromkeys(columnas + [COLUMNA_FILA])), filter=filtro).to_pandas()
+        df = compactar(df.set_index(COLUMNA_FILA).rename_axis(None))
+        return df.loc[posiciones, columnas]
+
+    def metricas(self, spec, temporadas=None):
+        """Métricas de la sección 6 (dict de motor.metricas) sin materializar las filas."""
+        return metricas_conteos(*self.conteos(spec, temporadas))
+
+    def agregados(self, spec, temporadas=None):
+        """
+        (conteos, resúmenes): lo mismo que conteos y graficos.resumenes sobre
+        filtrar(spec), sumado por bloques con solo las columnas de flags,
+        Fecha y Resultado O/U.
+        """
+        s = normalizar_spec(spec)
+        leer = list(dict.fromkeys(self._columnas_flags(s) + ['Fecha', 'Resultado O/U']))
+        partidos = ats = ml = overs = 0
+        partes = []
+        lector = self.dataset.scanner(columns=leer, filter=self._filtro(s, temporadas), batch_size=BLOQUE_FILAS)
+        for bloque in lector.to_batches():
+            if not bloque.num_rows: continue
+            b = self._con_flags(bloque.to_pandas(), s)
+            partidos += len(b)
+            ats += int(b['WIN_FLAG'].sum())
+            ml += int(b['ML_FLAG'].sum())
+            overs += int((b['Resultado O/U'] == 'Over').sum())
+            partes.append(resumenes(b))
+        if not partes:
+            vacio = self.dataset.to_table(columns=leer, filter=ds.scalar(False)).to_pandas()
+            partes.append(resumenes(self._con_flags(vacio, s)))
+        return (partidos, ats, ml, overs), sumar_resumenes(partes)
+
+    def conteos(self, spec, temporadas=None):
+        """(partidos, ATS ganados, ML ganados, overs) acumulados por bloques, leyendo solo las columnas de resultado."""
+        s = normalizar_spec(spec)
+        objetivo = s['modo'] == MODO_EQUIPO and s['target_team'] != 'Todos'
+        if s['modo'] == MODO_MODELO: leer = ['Resultado ATS', 'Resultado ML']
+        elif objetivo: leer = ['HomeTeam', 'Real_Home_Covered', 'Real_Away_Covered', 'Real_Home_Won', 'Real_Away_Won']
+        else: leer = ['Real_Home_Covered', 'Real_Home_Won']
+        leer.append('Resultado O/U')
+
+        partidos = ats = ml = overs = 0
+        lector = self.dataset.scanner(columns=leer, filter=self._filtro(s, temporadas), batch_size=BLOQUE_FILAS)
+        for bloque in lector.to_batches():
+            b = bloque.to_pandas()
+            if s['modo'] == MODO_MODELO:
+                gano, gano_ml = (b['Resultado ATS'] == 'SI').to_numpy(), (b['Resultado ML'] == 'SI').to_numpy()
+            elif objetivo:
+                local = (b['HomeTeam'] == s['target_team']).to_numpy()
+                gano = np.where(local, b['Real_Home_Covered'].to_numpy(dtype=bool), b['Real_Away_Covered'].to_numpy(dtype=bool))
+                gano_ml = np.where(local, b['Real_Home_Won'].to_numpy(dtype=bool), b['Real_Away_Won'].to_numpy(dtype=bool))
+            else:
+                gano, gano_ml = b['Real_Home_Covered'].to_numpy(dtype=bool), b['Real_Home_Won'].to_numpy(dtype=bool)
+            partidos += len(b)
+            ats += int(gano.sum())
+            ml += int(gano_ml.sum())
+            overs += int((b['Resultado O/U'] == 'Over').sum())
+        return partidos, ats, ml, overs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Exporta el dataset procesado a Parquet particionado por temporada.")
+    ap.add_argument('--archivo', default=ARCHIVO, help="Archivo, carpeta o glob de libros / CSV")
+    ap.add_argument('--carpeta', default=CARPETA_PARTICIONES)
+    ap.add_argument('--forzar', action='store_true', help="Reexporta aunque esté al día")
+    args = ap.parse_args(argv)
+    anterior = carpeta_actual(args.carpeta)
+    if args.forzar: version = exportar(cargar_dataset(args.archivo), args.carpeta)
+    else: version = asegurar_particiones(args.archivo, args.carpeta)
+    # La versión anterior puede estar abierta en una app corriendo: se conserva
+    limpiar_versiones(args.carpeta, [anterior])
+    meta = leer_meta(version)
+    temporadas = sorted(r for r in os.listdir(version) if r.startswith(COLUMNA_TEMPORADA))
+    print(f"{meta['filas']} partidos en {len(temporadas)} temporadas -> {version} ({', '.join(temporadas)})")
+
+
+if __name__ == '__main__':
+    main()
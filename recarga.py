@@ -0,0 +1,108 @@
+# ==============================================================================
+# CARGA EN SEGUNDO PLANO Y RECARGA AL CAMBIAR LAS FUENTES
+# ==============================================================================
+# Un hilo daemon construye el dataset (y sus estructuras de consulta) fuera
+# del script de la app y luego revisa cada INTERVALO_REVISION segundos si las
+# fuentes cambiaron (por defecto lista de archivos + mtime + tamaño, sin
+# leerlos; `huella` puede vigilar otra cosa, p. ej. la versión vigente de las
+# particiones). Al
+# detectar un cambio espera a que el archivo deje de cambiar, construye la
+# versión nueva en el mismo hilo y la cambia por la actual de una sola
+# asignación: cada corrida del script usa la versión que tomó al empezar.
+#
+# Si una reconstrucción falla se sigue sirviendo la última versión buena y se
+# guarda el error; se reintenta con el siguiente cambio de las fuentes. Un
+# error de al_cambiar también queda en `error` sin detener el hilo.
+#
+# al_cambiar(nuevo, anterior) corre después de cada cambio de versión (anterior
+# es None en la primera carga): ahí se liberan recursos de versiones viejas,
+# p. ej. las subcarpetas de particiones que ya nadie lee.
+# ==============================================================================
+import os
+import threading
+import time
+
+from almacen import listar_fuentes
+
+INTERVALO_REVISION = 5.0   # Segundos entre revisiones de las fuentes
+ESPERA_ESTABLE = 1.0       # Las fuentes deben quedarse quietas este tiempo antes de recargar
+
+
+def huella_fuentes(ruta):
+    """(archivo, mtime, tamaño) de cada fuente de `ruta`: cambia si se edita, agrega o borra un archivo."""
+    huella = []
+    for r in listar_fuentes(ruta):
+        try: st = os.stat(r)
+        except OSError: continue
+        huella.append((r, st.st_mtime_ns, st.st_size))
+    return tuple(huella)
+
+
+class Recargador:
+    """
+    Mantiene la última versión buena de `construir()` (p. ej. un Motor) y la
+    reemplaza en segundo plano cuando cambian las fuentes de `ruta`.
+    """
+
+    def __init__(self, ruta, construir, intervalo=INTERVALO_REVISION, espera_estable=ESPERA_ESTABLE, al_cambiar=None,
+                 huella=huella_fuentes):
+        self.ruta = ruta
+        self.construir = construir
+        self.huella = huella          # huella(ruta): cambia cuando hay que reconstruir
+        self.al_cambiar = al_cambiar
+        self.intervalo = intervalo
+        self.espera_estable = espera_estable
+        self.actual = None            # Última versión buena (se reemplaza, nunca se modifica)
+        self.error = None             # Error de la última construcción (o de al_cambiar); None si salió bien
+        self.cargado_en = None        # time.time() de la versión actual
+        self.segundos = None          # Lo que tardó en construirse
+        self.recargas = 0             # Versiones construidas (la primera carga cuenta)
+        self._huella = None
+        self._lista = threading.Event()   # Terminó el primer intento de carga
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        """Arranca el hilo (idempotente): primera carga y luego revisión periódica."""
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._vigilar, name='recargador-datos', daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        """Termina el hilo en su próxima espera (p. ej. al reemplazar el recurso de la app)."""
+        self._parar.set()
+
+    def obtener(self, espera=None):
+        """
+        Versión actual. Solo bloquea mientras no haya ninguna versión (arranque
+        en frío), hasta `espera` segundos; None si la primera carga falló.
+        """
+        if self.actual is None: self._lista.wait(espera)
+        return self.actual
+
+    def _construir(self, huella):
+        t0 = time.perf_counter()
+        try:
+            nuevo = self.construir()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        else:
+            anterior, self.actual, self.error = self.actual, nuevo, None
+            self.segundos, self.cargado_en = time.perf_counter() - t0, time.time()
+            self.recargas += 1
+            if self.al_cambiar is not None:
+                try: self.al_cambiar(nuevo, anterior)
+                except Exception as e: self.error = f"{type(e).__name__}: {e}"
+        # También en un fallo: no se reintenta hasta que las fuentes vuelvan a cambiar
+        self._huella = huella
+
+    def _vigilar(self):
+        self._construir(self.huella(self.ruta))
+        self._lista.set()
+        while not self._parar.wait(self.intervalo):
+            huella = self.huella(self.ruta)
+            if huella == self._huella: continue
+            # Un Excel guardándose cambia varias veces: recargar cuando se quede quieto
+            if self._parar.wait(self.espera_estable) or self.huella(self.ruta) != huella: continue
+            self._construir(huella)
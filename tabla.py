@@ -0,0 +1,80 @@
+# ==============================================================================
+# TABLA PAGINADA Y EXPORTACIÓN
+# ==============================================================================
+# La pestaña "Tabla Completa" ordena y pagina del lado del servidor: solo la
+# página visible pasa por el Styler y se envía al navegador. La exportación del
+# resultado completo se escribe por bloques a CSV / Parquet, sin estilos.
+# ==============================================================================
+import io
+
+TAMANOS_PAGINA = [25, 50, 100, 250, 500]
+FILAS_POR_BLOQUE = 50_000
+
+
+def style_ats(val): return f'background-color: {"rgba(46, 204, 113, 0.2)" if val=="SI" else "rgba(231, 76, 60, 0.2)"}'
+
+def style_streak(val):
+    try:
+        v = int(val)
+        if v >= 3: return 'color: #2ecc71; font-weight: bold'
+        if v <= -3: return 'color: #e74c3c; font-weight: bold'
+    except: pass
+    return ''
+
+
+def num_paginas(total, tam_pagina):
+    return max(1, -(-total // tam_pagina))
+
+
+def pagina(df, columnas, orden=None, ascendente=True, tam_pagina=50, num_pagina=1):
+    """
+    Filas de la página `num_pagina` (1-based) con las columnas pedidas. Para
+    ordenar solo se ordena la columna clave; el resto del df no se reordena ni
+    se copia.
+    """
+    inicio = (num_pagina - 1) * tam_pagina
+    if orden:
+        etiquetas = df[orden].sort_values(ascending=ascendente, kind='mergesort', na_position='last').index
+        return df.loc[etiquetas[inicio:inicio + tam_pagina], columnas]
+    return df.iloc[inicio:inicio + tam_pagina][columnas]
+
+
+def _map(estilo, func, subset):
+    # Styler.applymap se renombró a Styler.map en pandas 2.1
+    aplicar = getattr(estilo, 'map', None) or estilo.applymap
+    return aplicar(func, subset=subset)
+
+
+def estilo_pagina(pag):
+    """Styler con los colores de racha / ATS, solo para la página visible."""
+    estilo = pag.style
+    rachas = [c for c in ['Calc_Home_Streak', 'Calc_Away_Streak'] if c in pag.columns]
+    if rachas: estilo = _map(estilo, style_streak, rachas)
+    if 'Resultado ATS' in pag.columns: estilo = _map(estilo, style_ats, ['Resultado ATS'])
+    return estilo
+
+
+def exportar_csv(df, destino=None):
+    """Escribe df a CSV por bloques; devuelve bytes si no se pasa `destino`."""
+    salida = destino or io.BytesIO()
+    for i in range(0, max(len(df), 1), FILAS_POR_BLOQUE):
+        bloque = df.iloc[i:i + FILAS_POR_BLOQUE]
+        salida.write(bloque.to_csv(index=False, header=(i == 0)).encode('utf-8'))
+    return salida.getvalue() if destino is None else None
+
+
+def exportar_parquet(df, destino=None):
+    """Escribe df a Parquet con un row group por bloque; devuelve bytes si no se pasa `destino`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    salida = destino or io.BytesIO()
+    # Esquema del primer bloque; columnas sin datos ahí se escriben como texto
+    esquema = pa.Schema.from_pandas(df.iloc[:FILAS_POR_BLOQUE], preserve_index=False)
+    esquema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in esquema],
+                        metadata=esquema.metadata)
+    with pq.ParquetWriter(salida, esquema) as writer:
+        for i in range(0, len(df), FILAS_POR_BLOQUE):
+            bloque = df.iloc[i:i + FILAS_POR_BLOQUE]
+            writer.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+    return salida.getvalue() if destino is None else None
@@ -0,0 +1,81 @@
+# ==============================================================================
+# PRUEBAS DEL ALMACÉN (pytest)
+# ==============================================================================
+# Sobre libros sintéticos (generar_datos.py):
+#
+# - Carga incremental por cortes vs reconstrucción completa (con y sin juntar partes).
+# - Varias casas con el mismo partido (momios distintos) se unen sin duplicar.
+# - Cada versión del cache en su subcarpeta; cargar_dataset usa la de su hash.
+# ==============================================================================
+import os
+
+import pandas as pd
+import pytest
+
+import almacen
+from almacen import ARCHIVO_ACTUAL, ARCHIVO_ESTADO, _leer_previo, cargar_dataset, cargar_incremental, compactar, leer_fuentes, procesar
+from features import preparar_base, calcular_ventanas
+from generar_datos import generar, escribir
+
+PARTIDOS = 1500   # Más de una temporada: cruza el cambio de temporada
+
+
+@pytest.fixture(scope='module')
+def fuente():
+    return generar(PARTIDOS, semilla=11)
+
+
+@pytest.fixture(scope='module')
+def procesado(fuente):
+    return compactar(calcular_ventanas(procesar(preparar_base(fuente.copy()))))
+
+
+@pytest.mark.parametrize('max_partes', [2, almacen.MAX_PARTES])
+def test_incremental_igual_a_completo(fuente, procesado, tmp_path, monkeypatch, max_partes):
+    monkeypatch.setattr(almacen, 'MAX_PARTES', max_partes)
+    clave = ['Fecha', 'Partido (Local vs Visitante)']
+    def ordenar(x): return x.sort_values(clave, kind='mergesort').reset_index(drop=True)
+    fechas = fuente['Fecha'].sort_values().unique()
+    for corte in fechas[[len(fechas) // 4, len(fechas) // 2, 3 * len(fechas) // 4]]:
+        cargar_incremental(fuente[fuente['Fecha'] <= corte].copy(), str(tmp_path))
+    pd.testing.assert_frame_equal(ordenar(cargar_incremental(fuente.copy(), str(tmp_path))), ordenar(procesado))
+
+    # Editar un partido viejo obliga a reconstruir
+    editado = fuente.copy()
+    editado.loc[5, 'Resultado ATS'] = 'NO' if editado.loc[5, 'Resultado ATS'] == 'SI' else 'SI'
+    esperado = compactar(calcular_ventanas(procesar(preparar_base(editado.copy()))))
+    pd.testing.assert_frame_equal(ordenar(cargar_incremental(editado, str(tmp_path))), ordenar(esperado))
+
+
+def test_fuentes_de_varias_casas_sin_duplicados(fuente, tmp_path):
+    # La casa B repite la segunda mitad con otros momios en el texto del partido
+    casa_b = fuente.iloc[len(fuente) // 2:].copy()
+    casa_b['Partido (Local vs Visitante)'] = casa_b['Partido (Local vs Visitante)'].str.replace('(', '( ', regex=False)
+    escribir(fuente, str(tmp_path / 'a.csv'))
+    escribir(casa_b, str(tmp_path / 'b.csv'))
+    unido = leer_fuentes([str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')], workers=1)
+    assert len(unido) == len(fuente)
+    assert unido['Partido (Local vs Visitante)'].str.contains(r'\( ').sum() == len(casa_b)
+
+
+def test_versiones_del_cache(fuente, tmp_path):
+    cache = str(tmp_path / 'cache')
+    def versiones(): return sorted(n for n in os.listdir(cache) if os.path.isfile(os.path.join(cache, n, ARCHIVO_ESTADO)))
+    inicio = fuente[fuente['Fecha'] < fuente['Fecha'].iloc[700]]
+    escribir(inicio, str(tmp_path / 'a.csv'))
+    corto = cargar_dataset(str(tmp_path / 'a.csv'), cache)
+    escribir(fuente, str(tmp_path / 'a.csv'))
+    largo = cargar_dataset(str(tmp_path / 'a.csv'), cache)
+    assert len(versiones()) == 2 and len(corto) == len(inicio) and len(largo) == len(fuente)
+    # El puntero va a la última escrita: la parte vieja entra con hard link y las filas nuevas en otra
+    actual = _leer_previo(cache)
+    assert len(actual['hashes']) == len(fuente) and len(actual['partes']) == 2
+    anterior = os.path.join(cache, next(n for n in versiones() if n != os.path.basename(actual['ruta'])))
+    assert os.path.samefile(os.path.join(anterior, actual['partes'][0]), os.path.join(actual['ruta'], actual['partes'][0]))
+
+    # Volver al libro anterior lee su versión sin recalcular ni tocar el puntero
+    escribir(inicio, str(tmp_path / 'a.csv'))
+    puntero = os.path.getmtime(os.path.join(cache, ARCHIVO_ACTUAL))
+    pd.testing.assert_frame_equal(cargar_dataset(str(tmp_path / 'a.csv'), cache), corto)
+    assert os.path.getmtime(os.path.join(cache, ARCHIVO_ACTUAL)) == puntero
+    assert not [n for n in os.listdir(cache) if n.startswith('.tmp-')]
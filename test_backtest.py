@@ -0,0 +1,56 @@
+# ==============================================================================
+# PRUEBAS DEL BACKTEST (pytest)
+# ==============================================================================
+# Las unidades se miden en una unidad base fija: escalan con el monto por
+# partido y, con montos variables, siguen la misma ganancia que el ROI.
+# backtest_lote da lo mismo que curva / resumen por selección.
+# ==============================================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+from metricas import APUESTA
+
+
+@pytest.fixture(scope='module')
+def apuestas():
+    rng = np.random.default_rng(4)
+    n = 400
+    return pd.DataFrame({
+        'Fecha': pd.Timestamp('2025-10-21') + pd.to_timedelta(np.sort(rng.integers(0, 180, n)), unit='D'),
+        'WIN_FLAG': rng.random(n) < 0.5,
+        'Momio': rng.choice([-250, -150, -110, 120, 180, 300], n),
+        'Monto': rng.choice([50.0, 100.0, 250.0], n),
+    })
+
+
+def test_unidades_escalan_con_la_apuesta(apuestas):
+    base = backtest.resumen(backtest.curva(apuestas, apuesta=APUESTA))
+    doble = backtest.resumen(backtest.curva(apuestas, apuesta=2 * APUESTA))
+    assert doble['unidades'] == pytest.approx(2 * base['unidades'])
+    assert doble['max_drawdown'] == pytest.approx(2 * base['max_drawdown'])
+    assert doble['roi'] == pytest.approx(base['roi'])
+    mes, mes_doble = backtest.por_mes(backtest.curva(apuestas)), backtest.por_mes(backtest.curva(apuestas, apuesta=2 * APUESTA))
+    np.testing.assert_allclose(mes_doble['Unidades'], 2 * mes['Unidades'])
+
+
+def test_unidades_siguen_al_roi_con_montos_variables(apuestas):
+    c = backtest.curva(apuestas, apuesta='Monto', momio='Momio')
+    r = backtest.resumen(c)
+    assert r['unidades'] * APUESTA == pytest.approx(c['ganancia'].sum())
+    assert r['roi'] == pytest.approx(c['ganancia'].sum() / apuestas['Monto'].sum() * 100)
+    assert backtest.por_mes(c)['Unidades Acum.'].iloc[-1] == pytest.approx(r['unidades'])
+
+
+def test_lote_igual_a_curva(apuestas):
+    rng = np.random.default_rng(9)
+    selecciones = [np.sort(rng.choice(len(apuestas), k, replace=False)) for k in (0, 1, 40, 250)]
+    lote = backtest.backtest_lote(apuestas['Fecha'].to_numpy(), apuestas['WIN_FLAG'].to_numpy(), selecciones,
+                                  apuestas['Monto'].to_numpy(), apuestas['Momio'].to_numpy())
+    for fila, s in zip(lote.to_dict('records'), selecciones):
+        r = backtest.resumen(backtest.curva(apuestas.iloc[s], apuesta='Monto', momio='Momio'))
+        assert fila['apuestas'] == r['apuestas']
+        assert fila['unidades'] == pytest.approx(r['unidades'])
+        assert fila['max_drawdown'] == pytest.approx(r['max_drawdown'])
+        if r['apuestas']: assert fila['roi'] == pytest.approx(r['roi'])
@@ -0,0 +1,52 @@
+# ==============================================================================
+# PRUEBAS DE ESTADÍSTICA (pytest)
+# ==============================================================================
+# p_valor contra la suma binomial exacta en enteros (math.comb), de ambos
+# lados de la media: k muy por debajo de n·p0 debe dar p cercano a 1.
+# ==============================================================================
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from estadistica import p_valor, wilson
+
+# p0 = 0.524 como fracción exacta
+NUM, DEN = 524, 1000
+
+
+def _p_exacta(k, n):
+    """P(X >= k) sumando el lado más corto en enteros: sum C(n,j) a^j b^(n-j) / 1000^n."""
+    a, b = NUM, DEN - NUM
+    if k <= n * NUM / DEN:
+        menor = sum(math.comb(n, j) * a**j * b**(n - j) for j in range(k))
+        return float(1 - Fraction(menor, DEN**n))
+    return float(Fraction(sum(math.comb(n, j) * a**j * b**(n - j) for j in range(k, n + 1)), DEN**n))
+
+
+CASOS = [
+    (0, 1), (1, 1), (4, 5), (5, 5), (10, 10), (0, 10),
+    (524, 1000), (520, 1000), (540, 1000), (600, 1000), (700, 1000),
+    (0, 1000), (300, 1000), (450, 1000), (1350, 3000), (1540, 3000), (1620, 3000),
+]
+
+
+@pytest.mark.parametrize('k, n', CASOS)
+def test_p_valor_exacto(k, n):
+    assert p_valor(k, n) == pytest.approx(_p_exacta(k, n), rel=1e-9, abs=1e-300)
+
+
+def test_p_valor_vectorizado_y_perdedores():
+    k, n = np.array([c[0] for c in CASOS]), np.array([c[1] for c in CASOS])
+    np.testing.assert_allclose(p_valor(k, n), [p_valor(a, b) for a, b in CASOS], rtol=1e-12)
+    # Situaciones perdedoras con muestras grandes: nunca significativas
+    assert p_valor(0, 1000) == 1.0
+    assert p_valor(3000, 10_000) > 0.999
+    assert p_valor(22_500, 50_000) > 0.999
+    assert np.isnan(p_valor(0, 0))
+
+
+def test_wilson_contiene_la_proporcion():
+    lo, hi = wilson(np.array([0, 5, 60]), np.array([10, 10, 100]))
+    assert (lo <= [0, 50, 60]).all() and (hi >= [0, 50, 60]).all()
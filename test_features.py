@@ -0,0 +1,114 @@
+# ==============================================================================
+# PRUEBAS DE PARIDAD DE FEATURES (pytest)
+# ==============================================================================
+# Comprueba sobre libros sintéticos (generar_datos.py) que calcular_features
+# da lo mismo que el ciclo fila por fila original (verificar_paridad),
+# también sembrando el estado por equipo (extraer_estado) a mitad de la
+# historia, y con partidos cuyo texto no se puede leer (equipos None).
+# calcular_ventanas se compara contra un conteo por fuerza bruta.
+#
+# Uso:
+#   python -m pytest -q
+# ==============================================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import (VENTANA_COLS, preparar_base, calcular_features, calcular_ventanas, extraer_estado, parse_teams,
+                      verificar_paridad)
+from generar_datos import generar
+
+PARTIDOS = 1500   # Más de una temporada: cruza el cambio de temporada
+
+
+@pytest.fixture(scope='module')
+def fuente():
+    return generar(PARTIDOS, semilla=11)
+
+
+def test_paridad_features(fuente):
+    verificar_paridad(fuente)
+    base = preparar_base(fuente.copy())
+    pd.testing.assert_frame_equal(base[['HomeTeam', 'AwayTeam']],
+                                  base.apply(parse_teams, axis=1, result_type='expand').set_axis(['HomeTeam', 'AwayTeam'], axis=1))
+
+
+def test_paridad_features_con_estado(fuente):
+    base = preparar_base(fuente.copy())
+    completo = calcular_features(base)
+    corte = base['Fecha'].iloc[len(base) // 2]
+    viejo = (base['Fecha'] <= corte).to_numpy()
+    antes = calcular_features(base[viejo].reset_index(drop=True))
+    despues = calcular_features(base[~viejo].reset_index(drop=True), extraer_estado(antes))
+    pd.testing.assert_frame_equal(pd.concat([antes, despues], ignore_index=True), completo)
+
+
+@pytest.fixture(scope='module')
+def con_ilegibles(fuente):
+    # Partidos sin formato (None vs None) y con el mismo equipo en ambos lados
+    df = fuente.copy()
+    filas = np.random.default_rng(0).choice(len(df), 40, replace=False)
+    df.loc[filas[:30], 'Partido (Local vs Visitante)'] = 'Partido sin formato'
+    df.loc[filas[30:], 'Partido (Local vs Visitante)'] = 'LAL vs LAL'
+    return df
+
+
+def test_paridad_con_partidos_ilegibles(con_ilegibles):
+    verificar_paridad(con_ilegibles)
+    base = preparar_base(con_ilegibles.copy())
+    pd.testing.assert_frame_equal(base[['HomeTeam', 'AwayTeam']],
+                                  base.apply(parse_teams, axis=1, result_type='expand').set_axis(['HomeTeam', 'AwayTeam'], axis=1))
+    assert base['HomeTeam'].isna().sum() == 30
+
+    corte = base['Fecha'].iloc[len(base) // 2]
+    viejo = (base['Fecha'] <= corte).to_numpy()
+    antes = calcular_features(base[viejo].reset_index(drop=True))
+    despues = calcular_features(base[~viejo].reset_index(drop=True), extraer_estado(antes))
+    pd.testing.assert_frame_equal(pd.concat([antes, despues], ignore_index=True), calcular_features(base))
+
+
+# ==============================================================================
+# VENTANAS VS FUERZA BRUTA
+# ==============================================================================
+def _ventanas_fuerza_bruta(df, n, dias):
+    """Cada ventana recorriendo todos los partidos anteriores del equipo (sin el actual)."""
+    cols = {k: [] for k in VENTANA_COLS}
+    dia = df['Fecha'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    # (fila, lado, equipo, cubrió, ganó) de cada equipo en cada partido
+    lados = [(j, l, df[f'{l}Team'].iloc[j], bool(df[f'Real_{l}_Covered'].iloc[j]), bool(df[f'Real_{l}_Won'].iloc[j]))
+             for j in range(len(df)) for l in ('Home', 'Away')]
+    def record(valores): return f"{sum(valores[-n:])}-{n - sum(valores[-n:])}" if len(valores) >= n else "N/A"
+    for r in range(len(df)):
+        for lado in ('Home', 'Away'):
+            equipo = df[f'{lado}Team'].iloc[r]
+            previos = [x for x in lados if x[0] < r and x[2] == equipo]
+            cols[f'Calc_{lado}_ATS_Ult'].append(record([x[3] for x in previos]))
+            cols[f'Calc_{lado}_ML_Ult'].append(record([x[4] for x in previos]))
+            cols[f'Calc_{lado}_ATS_Rol'].append(record([x[3] for x in previos if x[1] == lado]))
+            dias_previos = [dia[x[0]] for x in previos]
+            en_ventana = [k for k, d in enumerate(dias_previos) if d >= dia[r] - dias]
+            cols[f'Calc_{lado}_Juegos_Dias'].append(len(en_ventana))
+            cols[f'Calc_{lado}_B2B_Dias'].append(sum(1 for k in en_ventana if k > 0 and dias_previos[k] - dias_previos[k - 1] == 1))
+    return cols
+
+
+def test_ventanas_igual_a_fuerza_bruta():
+    # Pocos equipos y muchas fechas repetidas (dos partidos del mismo equipo
+    # el mismo día) más un hueco de pretemporada entre dos temporadas
+    rng = np.random.default_rng(3)
+    partidos = 400
+    dias = np.sort(rng.integers(0, 90, partidos))
+    dias[partidos // 2:] += 150
+    equipos = np.array(['ATL', 'BOS', 'CHI', 'DAL', 'DEN', 'LAL'])
+    local = rng.integers(0, len(equipos), partidos)
+    visita = (local + rng.integers(1, len(equipos), partidos)) % len(equipos)
+    cubrio, gano = rng.random(partidos) < 0.5, rng.random(partidos) < 0.5
+    df = pd.DataFrame({
+        'Fecha': pd.Timestamp('2024-10-20') + pd.to_timedelta(dias, unit='D'),
+        'HomeTeam': equipos[local], 'AwayTeam': equipos[visita],
+        'Real_Home_Covered': cubrio, 'Real_Away_Covered': ~cubrio, 'Real_Home_Won': gano, 'Real_Away_Won': ~gano,
+    })
+    for n, ventana in ((5, 7), (3, 2)):
+        res = calcular_ventanas(df, n, ventana)
+        for col, esperado in _ventanas_fuerza_bruta(df, n, ventana).items():
+            assert res[col].tolist() == esperado, (n, ventana, col)
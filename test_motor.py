@@ -0,0 +1,99 @@
+# ==============================================================================
+# PRUEBAS DEL MOTOR DE FILTROS (pytest)
+# ==============================================================================
+# Motor.filtrar (índice de filtros + tabla equipo-partido) vs la cadena de
+# filtros original de la sección 5, con specs al azar de ambos modos.
+# ==============================================================================
+import random
+
+import numpy as np
+import pytest
+
+from almacen import compactar, procesar
+from features import preparar_base, calcular_ventanas
+from filtros import MODO_MODELO, MODO_EQUIPO, OPCIONES_RACHA, ROLES
+from generar_datos import generar
+from motor import Motor, normalizar_spec
+
+
+@pytest.fixture(scope='module')
+def procesado():
+    return compactar(calcular_ventanas(procesar(preparar_base(generar(1500, semilla=11)))))
+
+
+def _cadena_original(df, s):
+    """La sección 5 tal como estaba antes del índice de filtros (filtro por filtro sobre copias)."""
+    df_f = df.copy()
+    if s['h2h'] != 'Todos': df_f = df_f[df_f['H2H_Season'].fillna("").astype(str) == s['h2h']]
+    if s['modo'] == MODO_MODELO:
+        for clave, col in [('equipo', 'Selección Modelo'), ('condicion', 'EsLocal'), ('confianza', 'Confianza'),
+                           ('ml', 'Tipo de Momio'), ('travel_pick', 'Calc_Pick_Travel'), ('travel_opp', 'Calc_Opp_Travel'),
+                           ('prev_pick_ats', 'Calc_Pick_Prev_ATS'), ('prev_opp_ats', 'Calc_Opp_Prev_ATS'),
+                           ('prev_pick_ml', 'Calc_Pick_Prev_ML'), ('prev_opp_ml', 'Calc_Opp_Prev_ML'),
+                           ('prev_pick_ou', 'Calc_Pick_Prev_OU'), ('prev_opp_ou', 'Calc_Opp_Prev_OU')]:
+            if s[clave] != 'Todos': df_f = df_f[df_f[col] == s[clave]]
+        df_f['WIN_FLAG'] = df_f['Resultado ATS'] == 'SI'
+        df_f['ML_FLAG'] = df_f['Resultado ML'] == 'SI'
+    else:
+        equipo, rol, clase = s['target_team'], s['role'], s['status_team_class']
+        if equipo != 'Todos': df_f = df_f[(df_f['HomeTeam'] == equipo) | (df_f['AwayTeam'] == equipo)]
+        if rol == "Local (Home)":
+            if equipo != 'Todos': df_f = df_f[df_f['HomeTeam'] == equipo]
+            if clase != 'Todos': df_f = df_f[df_f['Real_Home_Class'] == clase]
+        elif rol == "Visita (Away)":
+            if equipo != 'Todos': df_f = df_f[df_f['AwayTeam'] == equipo]
+            if clase != 'Todos': df_f = df_f[df_f['Real_Away_Class'] == clase]
+        elif equipo != 'Todos' and clase != 'Todos':
+            df_f = df_f[((df_f['HomeTeam'] == equipo) & (df_f['Real_Home_Class'] == clase)) |
+                        ((df_f['AwayTeam'] == equipo) & (df_f['Real_Away_Class'] == clase))]
+        for clave, col in [('travel_pick', 'Calc_Home_Travel'), ('travel_opp', 'Calc_Away_Travel'),
+                           ('prev_pick_ats', 'Calc_Home_Prev_ATS'), ('prev_opp_ats', 'Calc_Away_Prev_ATS'),
+                           ('prev_pick_ml', 'Calc_Home_Prev_ML'), ('prev_opp_ml', 'Calc_Away_Prev_ML')]:
+            if s[clave] != 'Todos': df_f = df_f[df_f[col] == s[clave]]
+        if equipo != 'Todos':
+            local = df_f['HomeTeam'] == equipo
+            df_f['WIN_FLAG'] = np.where(local, df_f['Real_Home_Covered'], df_f['Real_Away_Covered'])
+            df_f['ML_FLAG'] = np.where(local, df_f['Real_Home_Won'], df_f['Real_Away_Won'])
+        else:
+            df_f['WIN_FLAG'] = df_f['Real_Home_Covered']
+            df_f['ML_FLAG'] = df_f['Real_Home_Won']
+    for col, label in [('Calc_Home_Streak', s['streak_h']), ('Calc_Away_Streak', s['streak_a'])]:
+        if label == 'Todos': continue
+        num = int(label.split('+')[0])
+        df_f = df_f[df_f[col] >= num] if "Victorias" in label else df_f[df_f[col] <= -num]
+    for clave, col in [('rest_h', 'Calc_Home_Rest'), ('rest_a', 'Calc_Away_Rest'), ('tipo', 'Tipo de Partido'),
+                       ('linea', 'Nivel de Línea'), ('ml', 'Tipo de Momio')]:
+        if s[clave] != 'Todos': df_f = df_f[df_f[col] == s[clave]]
+    return df_f
+
+
+FILTROS_BASE = {
+    'equipo': 'Selección Modelo', 'condicion': 'EsLocal', 'confianza': 'Confianza', 'ml': 'Tipo de Momio',
+    'h2h': 'H2H_Season', 'travel_pick': 'Calc_Home_Travel', 'travel_opp': 'Calc_Away_Travel',
+    'prev_pick_ats': 'Calc_Pick_Prev_ATS', 'prev_opp_ats': 'Calc_Away_Prev_ATS', 'prev_pick_ml': 'Calc_Home_Prev_ML',
+    'prev_pick_ou': 'Calc_Pick_Prev_OU', 'rest_h': 'Calc_Home_Rest', 'rest_a': 'Calc_Away_Rest',
+    'tipo': 'Tipo de Partido', 'linea': 'Nivel de Línea',
+}
+
+
+def test_motor_igual_a_cadena_original(procesado):
+    motor = Motor(procesado)
+    equipos = motor.indice.valores('HomeTeam')
+    clases = motor.indice.valores('Real_Home_Class') + motor.indice.valores('Real_Away_Class')
+    rng = random.Random(0)
+    con_filas = 0
+    for _ in range(200):
+        spec = {'modo': rng.choice([MODO_MODELO, MODO_EQUIPO])}
+        for clave in rng.sample(list(FILTROS_BASE), rng.randint(0, 3)):
+            spec[clave] = rng.choice([v for v in motor.indice.valores(FILTROS_BASE[clave]) if v != "N/A"])
+        if rng.random() < 0.3: spec[rng.choice(['streak_h', 'streak_a'])] = rng.choice(OPCIONES_RACHA[1:])
+        if spec['modo'] == MODO_EQUIPO:
+            if rng.random() < 0.5: spec['target_team'] = rng.choice(equipos)
+            spec['role'] = rng.choice(ROLES)
+            if rng.random() < 0.5: spec['status_team_class'] = rng.choice(clases)
+        nuevo, original = motor.filtrar(spec), _cadena_original(procesado, normalizar_spec(spec))
+        assert list(nuevo.index) == list(original.index), spec
+        for flag in ('WIN_FLAG', 'ML_FLAG'):
+            assert nuevo[flag].astype(bool).tolist() == original[flag].astype(bool).tolist(), (spec, flag)
+        con_filas += len(nuevo) > 0
+    assert con_filas > 50
@@ -0,0 +1,66 @@
+# ==============================================================================
+# PRUEBAS DE PARTICIONES (pytest)
+# ==============================================================================
+# Reexportar con un MotorDisco abierto: la versión vieja se sigue leyendo
+# hasta que limpiar_versiones la borra, después del cambio. Los agregados por
+# bloques dan lo mismo que agregar las filas de filtrar.
+# ==============================================================================
+import os
+
+import pandas as pd
+import pytest
+
+import particiones
+from generar_datos import generar, escribir
+from graficos import resumenes
+from motor import metricas
+from particiones import ARCHIVO_ACTUAL, MotorDisco, carpeta_actual, limpiar_versiones
+
+SPEC = {'modo': 'modelo'}
+
+
+@pytest.fixture
+def fuente(tmp_path, monkeypatch):
+    # cargar_dataset escribe su caché en .cache_v14/ del directorio actual
+    monkeypatch.chdir(tmp_path)
+    return generar(1200, semilla=5)
+
+
+def test_reexportar_no_rompe_el_motor_abierto(fuente, tmp_path):
+    ruta, carpeta = str(tmp_path / 'a.csv'), str(tmp_path / 'parts')
+    escribir(fuente.iloc[:600], ruta)
+    viejo = MotorDisco.desde_archivo(ruta, carpeta)
+    escribir(fuente, ruta)
+    nuevo = MotorDisco.desde_archivo(ruta, carpeta)
+
+    assert nuevo.carpeta != viejo.carpeta and carpeta_actual(carpeta) == nuevo.carpeta
+    assert viejo.metricas(SPEC)['partidos'] == len(viejo.filtrar(SPEC)) == 600
+    assert nuevo.metricas(SPEC)['partidos'] == 1200
+
+    limpiar_versiones(carpeta, [nuevo.carpeta, viejo.carpeta])
+    assert viejo.metricas(SPEC)['partidos'] == 600
+    limpiar_versiones(carpeta, [nuevo.carpeta])
+    assert sorted(os.listdir(carpeta)) == sorted([ARCHIVO_ACTUAL, os.path.basename(nuevo.carpeta)])
+    assert MotorDisco(carpeta).metricas(SPEC) == nuevo.metricas(SPEC)
+
+
+@pytest.mark.parametrize('spec', [
+    SPEC,
+    {'modo': 'modelo', 'rest_h': '1'},
+    {'modo': 'equipo'},
+    {'modo': 'equipo', 'target_team': 'BOS'},
+    {'modo': 'equipo', 'target_team': 'BOS', 'role': 'Local (Home)', 'prev_pick_ats': 'SI'},
+])
+def test_agregados_por_bloques(fuente, tmp_path, monkeypatch, spec):
+    ruta = str(tmp_path / 'a.csv')
+    escribir(fuente, ruta)
+    motor = MotorDisco.desde_archivo(ruta, str(tmp_path / 'parts'))
+    monkeypatch.setattr(particiones, 'BLOQUE_FILAS', 100)   # Varios bloques por temporada
+    df_f = motor.filtrar(spec)
+    (partidos, ats, ml, overs), graf = motor.agregados(spec)
+    assert metricas(df_f) == motor.metricas(spec) == particiones.metricas_conteos(partidos, ats, ml, overs)
+    for k, esperado in resumenes(df_f).items():
+        orden = list(esperado.columns[:1])
+        pd.testing.assert_frame_equal(graf[k].sort_values(orden, ignore_index=True), esperado.sort_values(orden, ignore_index=True),
+                                      check_dtype=False)
+    pd.testing.assert_index_equal(motor.claves(spec).index, df_f.index)